@@ -1,28 +1,74 @@
 from passlib.context import CryptContext
 from fastapi import HTTPException, Request, Depends, status
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
+from typing import Optional
 from app.models import User
-from app.database import get_db
+from app.database import get_async_db, get_db
+from app.identity_cache import UserIdentity, identity_cache
 
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
 
-def get_current_user(request: Request, db: Session = Depends(get_db)) -> User:
+def get_current_user(request: Request, db: Session = Depends(get_db)) -> UserIdentity:
+    """
+    Возвращает снимок текущего пользователя из кэша (только для чтения).
+    Маршрутам, которые изменяют пользователя, нужен get_current_user_fresh.
+    """
     user_id = request.session.get("user_id")
     if not user_id:
         # Сделано без raise_error=False, чтобы вызвать именно 401 ошибку, а не 403
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED, detail="Unauthorized"
         )
+    user = identity_cache.get(db, user_id)
+    if not user:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED, detail="User not found"
+        )
+    return user
+
+
+async def get_current_user_async(
+    request: Request, db: AsyncSession = Depends(get_async_db)
+) -> UserIdentity:
+    """
+    Асинхронная версия get_current_user для маршрутов на асинхронной сессии.
+    """
+    user_id = request.session.get("user_id")
+    if not user_id:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED, detail="Unauthorized"
+        )
+    user = await db.run_sync(identity_cache.get, user_id)
+    if not user:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED, detail="User not found"
+        )
+    return user
+
+
+def get_current_user_fresh(request: Request, db: Session = Depends(get_db)) -> User:
+    """
+    Загружает текущего пользователя из БД как ORM-объект (для изменения).
+    """
+    user_id = request.session.get("user_id")
+    if not user_id:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED, detail="Unauthorized"
+        )
     user = db.query(User).filter(User.id == user_id).first()
     if not user:
+        identity_cache.invalidate(user_id)
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED, detail="User not found"
         )
     return user
 
 
-def get_optional_user(request: Request, db: Session = Depends(get_db)) -> User:
+def get_optional_user(
+    request: Request, db: Session = Depends(get_db)
+) -> Optional[UserIdentity]:
     """
     Возвращает текущего пользователя если он авторизован, иначе None.
     """
@@ -30,11 +76,10 @@ def get_optional_user(request: Request, db: Session = Depends(get_db)) -> User:
     if not user_id:
         return None
 
-    user = db.query(User).filter(User.id == user_id).first()
-    return user
+    return identity_cache.get(db, user_id)
 
 
-def get_admin_user(current_user: User = Depends(get_current_user)) -> User:
+def get_admin_user(current_user: UserIdentity = Depends(get_current_user)) -> UserIdentity:
     if current_user.role != "admin":
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
@@ -23,12 +23,58 @@ class Settings(BaseSettings):
     ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 30
 
+    # Пул соединений с БД (не заданные значения берутся по умолчанию для диалекта)
+    DB_POOL_SIZE: Optional[int] = None
+    DB_MAX_OVERFLOW: Optional[int] = None
+    DB_POOL_TIMEOUT: float = 30
+    DB_POOL_RECYCLE: Optional[int] = None
+    DB_POOL_PRE_PING: Optional[bool] = None
+
+    # Производственный профиль SQLite: WAL, PRAGMA и отдельное соединение для записи
+    SQLITE_PERFORMANCE_PROFILE: bool = False
+    SQLITE_MMAP_SIZE: int = 268435456  # 256 МБ
+    SQLITE_CACHE_SIZE: int = -65536  # отрицательное значение - в КиБ (64 МБ)
+    SQLITE_BUSY_TIMEOUT_MS: int = 5000
+
     # Настройки отладки
     DEBUG: bool = False
 
     # Инициализация базы данных при запуске
     INIT_DB: bool = False
 
+    # Период принудительного обновления пула слов в памяти (0 - только по инвалидации)
+    WORD_POOL_REFRESH_SECONDS: int = 300
+
+    # Кэш недавно использованных слов (исключаются из новых раундов)
+    RECENT_WORDS_HOURS: int = 48
+    RECENT_WORDS_MAX_PER_USER: int = 1000
+    RECENT_WORDS_MAX_USERS: int = 10000
+    RECENT_WORDS_RESYNC_SECONDS: int = 300
+
+    # Взвешенный выбор слов: доля изменений счетчиков (от числа слов сложности),
+    # после которой таблица весов перестраивается
+    WORD_WEIGHTS_REBUILD_DRIFT: float = 0.1
+
+    # Как часто проверять поколение игровых настроек (изменения из других процессов)
+    GAME_SETTINGS_CHECK_SECONDS: float = 5
+
+    # Отложенная запись ответов: размер пачки, период сброса и предел очереди
+    WRITE_BUFFER_BATCH_SIZE: int = 500
+    WRITE_BUFFER_FLUSH_SECONDS: float = 1.0
+    WRITE_BUFFER_MAX_QUEUE: int = 50000
+
+    # Запас заранее перемешанных анаграмм: вариантов на слово и предел числа слов
+    SCRAMBLE_POOL_PER_WORD: int = 3
+    SCRAMBLE_POOL_MAX_WORDS: int = 100000
+
+    # Пул процессов bcrypt: число процессов (0 - пул потоков) и предел ожидающих операций
+    PASSWORD_HASH_WORKERS: int = 2
+    PASSWORD_HASH_MAX_PENDING: int = 32
+
+    # Кэш данных авторизованного пользователя (get_current_user)
+    USER_CACHE_TTL_SECONDS: float = 30
+    USER_CACHE_MAX_USERS: int = 10000
+
     # Новый способ конфигурации в Pydantic v2
     model_config = {
         "env_file": ".env",
@@ -2,18 +2,45 @@ from sqlalchemy import asc, create_engine
 from sqlalchemy.orm import declarative_base
 from sqlalchemy.orm import sessionmaker
 from sqlalchemy.orm import Session
-from sqlalchemy import func, desc
+from sqlalchemy import bindparam, case, exists, func, desc, insert, select, update
+from sqlalchemy import literal
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from dotenv import load_dotenv
 import os
 import logging
 
-import random
 from datetime import datetime, time, timezone, timedelta
-from typing import List, Optional, Dict, Any, Tuple
+from typing import Collection, Iterable, List, NamedTuple, Optional, Dict, Any, Sequence, Tuple
 
 from app.config import settings
-from app.models import User, UserWordHistory, Word, GameSession, GameSetting
+from app.db_pool import pool_options
+from app.sqlite_profile import (
+    apply_sqlite_pragmas,
+    is_sqlite_file,
+    make_routing_session_class,
+    use_immediate_transactions,
+    writer_pool_options,
+)
+from app.identity_cache import identity_cache
+from app.models import (
+    User,
+    UserWordHistory,
+    Word,
+    WordReview,
+    UserWordStats,
+    GameSession,
+    GameSetting,
+    UTCDateTime,
+    WordUsageDaily,
+)
 from app.password_utils import get_password_hash
+from app.recent_words import recent_words
+from app.settings_cache import game_settings_cache
+from app.spaced_repetition import INITIAL_STATE, ReviewState, next_review
+from app.word_pool import WordRecord, word_pool
+from app.word_weights import word_sampler
+from app.write_behind import AnswerEvent
 
 load_dotenv()
 
@@ -35,27 +62,110 @@ engine = create_engine(
     echo=settings.DEBUG,  # SQL-логи только если DEBUG=True
     # Для SQLite нужно убедиться, что check_same_thread=False
     connect_args=({"check_same_thread": False} if DATABASE_URL.startswith("sqlite") else {}),
+    **pool_options(DATABASE_URL, "sync"),
 )
 
 # Создаем фабрику сессий
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# Асинхронные драйверы для игрового API
+ASYNC_DRIVERS = {"sqlite": "sqlite+aiosqlite", "postgresql": "postgresql+asyncpg"}
+
+
+def get_async_database_url(url: str) -> str:
+    """Переводит URL базы данных на асинхронный драйвер (aiosqlite / asyncpg)."""
+    parsed = make_url(url)
+    driver = ASYNC_DRIVERS.get(parsed.get_backend_name())
+    if not driver:
+        raise ValueError(f"Нет асинхронного драйвера для {parsed.get_backend_name()}")
+    return parsed.set(drivername=driver).render_as_string(hide_password=False)
+
+
+# Асинхронный движок и фабрика сессий (игровой API); синхронные остаются для админки и CLI
+async_engine = create_async_engine(
+    get_async_database_url(DATABASE_URL),
+    echo=settings.DEBUG,
+    **pool_options(DATABASE_URL, "async", is_async=True),
+)
+AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+
+# Производственный профиль SQLite: PRAGMA на всех соединениях и записи через
+# отдельный движок с одним соединением (для синхронных и асинхронных сессий)
+writer_engine = None
+async_writer_engine = None
+if settings.SQLITE_PERFORMANCE_PROFILE and is_sqlite_file(make_url(DATABASE_URL)):
+    writer_engine = create_engine(
+        DATABASE_URL,
+        echo=settings.DEBUG,
+        connect_args={"check_same_thread": False},
+        **writer_pool_options("sync-writer"),
+    )
+    async_writer_engine = create_async_engine(
+        get_async_database_url(DATABASE_URL),
+        echo=settings.DEBUG,
+        **writer_pool_options("async-writer", is_async=True),
+    )
+    for profiled_engine in (
+        engine,
+        writer_engine,
+        async_engine.sync_engine,
+        async_writer_engine.sync_engine,
+    ):
+        apply_sqlite_pragmas(profiled_engine)
+    for writer in (writer_engine, async_writer_engine.sync_engine):
+        use_immediate_transactions(writer)
+
+    SessionLocal = sessionmaker(
+        class_=make_routing_session_class(engine, writer_engine),
+        autocommit=False,
+        autoflush=False,
+    )
+    AsyncSessionLocal = async_sessionmaker(
+        sync_session_class=make_routing_session_class(
+            async_engine.sync_engine, async_writer_engine.sync_engine
+        ),
+        autoflush=False,
+        expire_on_commit=False,
+    )
+
 # Создаем базовый класс для моделей
 Base = declarative_base()
 
 
 def get_db():
     """
-    Создает и возвращает сессию базы данных,
+    Создает и возвращает сессию базы данных на время запроса,
     автоматически закрывая ее после использования.
+
+    FastAPI кэширует зависимость в пределах запроса, поэтому авторизация и
+    маршрут используют одну сессию. При ошибке незафиксированные изменения
+    откатываются.
     """
     db = SessionLocal()
     try:
         yield db
+    except Exception:
+        db.rollback()
+        raise
     finally:
         db.close()
 
 
+async def get_async_db():
+    """
+    Создает и возвращает асинхронную сессию базы данных на время запроса,
+    автоматически закрывая ее после использования.
+    """
+    db = AsyncSessionLocal()
+    try:
+        yield db
+    except Exception:
+        await db.rollback()
+        raise
+    finally:
+        await db.close()
+
+
 def init_db():
     try:
         from app.models import Base
@@ -142,6 +252,7 @@ def update_user(db: Session, user_id: int, **kwargs) -> Optional[User]:
             setattr(user, key, value)
 
     db.commit()
+    identity_cache.invalidate(user_id)
     db.refresh(user)
     return user
 
@@ -152,6 +263,11 @@ def update_user_last_login(db: Session, user_id: int) -> None:
     if user:
         user.last_login = datetime.now(timezone.utc)
         db.commit()
+        identity_cache.invalidate(user_id)
+
+
+# Слово считается выученным после стольких правильных ответов подряд
+MASTERED_STREAK = 3
 
 
 def get_user_stats(db: Session, user_id: int) -> Dict[str, Any]:
@@ -160,28 +276,119 @@ def get_user_stats(db: Session, user_id: int) -> Dict[str, Any]:
     if not user:
         return None
 
-    # Получаем общее количество игр
-    total_games = (
-        db.query(func.count(GameSession.id)).filter(GameSession.user_id == user_id).scalar() or 0
-    )
-
-    # Получаем общее количество правильных ответов
-    correct_answers = (
-        db.query(func.sum(GameSession.correct_answers))
-        .filter(GameSession.user_id == user_id)
-        .scalar()
-        or 0
-    )
-
     return {
         "level": user.level,
         "experience": user.experience,
         "total_points": user.total_points,
-        "total_games": total_games,
-        "correct_answers": correct_answers,
+        # Итоги игр хранятся в строке пользователя (обновляются вместе с сессиями)
+        "total_games": user.total_games or 0,
+        "correct_answers": user.total_correct or 0,
+    }
+
+
+def get_user_word_summary(db: Session, user_id: int) -> Dict[str, Any]:
+    """
+    Итоги пользователя по словам для страницы профиля.
+
+    Один проход по строкам пользователя в user_word_stats, поэтому вызывается
+    только там, где итоги показываются (get_user_stats читает одну строку users).
+    """
+    words_seen, words_mastered, answers, answers_correct = db.query(
+        func.count(UserWordStats.word_id),
+        func.sum(case((UserWordStats.streak >= MASTERED_STREAK, 1), else_=0)),
+        func.sum(UserWordStats.seen),
+        func.sum(UserWordStats.correct),
+    ).filter(UserWordStats.user_id == user_id).one()
+
+    return {
+        "words_seen": words_seen or 0,
+        "words_mastered": words_mastered or 0,
+        "accuracy": (answers_correct or 0) / answers if answers else 0.0,
     }
 
 
+def _game_counters_update(user_id: int, **deltas):
+    """UPDATE users SET счетчик = счетчик + приращение (без чтения строки)."""
+    return (
+        update(User)
+        .where(User.id == user_id)
+        .values({name: getattr(User, name) + delta for name, delta in deltas.items()})
+        .execution_options(synchronize_session=False)
+    )
+
+
+def _correct_answers_update(session: GameSession, correct_answers: int):
+    """
+    Приращение total_correct при завершении сессии.
+
+    Сессия может завершаться повторно (результаты накопительные), поэтому
+    прибавляется разница с ранее записанным значением. Выполнять до изменения
+    полей сессии, чтобы подзапрос прочитал прежнее значение, и после блокировки
+    строки сессии (SELECT ... FOR UPDATE): иначе в PostgreSQL (READ COMMITTED)
+    два параллельных завершения прочитают одно прежнее значение и разница
+    будет учтена дважды.
+    """
+    previous = (
+        select(func.coalesce(GameSession.correct_answers, 0))
+        .where(GameSession.id == session.id)
+        .scalar_subquery()
+    )
+    return _game_counters_update(session.user_id, total_correct=correct_answers - previous)
+
+
+def check_user_counters(db: Session, repair: bool = False) -> List[Dict[str, Any]]:
+    """
+    Сверяет total_games / total_correct пользователей с game_sessions.
+
+    Args:
+        repair: Исправить расхождения
+
+    Returns:
+        Список расхождений: ID пользователя, сохраненные и фактические значения
+    """
+    actual = {
+        user_id: (games, correct or 0)
+        for user_id, games, correct in db.query(
+            GameSession.user_id,
+            func.count(GameSession.id),
+            func.sum(GameSession.correct_answers),
+        ).group_by(GameSession.user_id)
+    }
+
+    mismatches = []
+    for user_id, total_games, total_correct in db.query(
+        User.id, User.total_games, User.total_correct
+    ):
+        games, correct = actual.get(user_id, (0, 0))
+        if (total_games, total_correct) != (games, correct):
+            mismatches.append(
+                {
+                    "user_id": user_id,
+                    "stored": (total_games, total_correct),
+                    "actual": (games, correct),
+                }
+            )
+
+    if repair and mismatches:
+        table = User.__table__
+        db.execute(
+            update(table)
+            .where(table.c.id == bindparam("b_user_id"))
+            .values(total_games=bindparam("b_games"), total_correct=bindparam("b_correct")),
+            [
+                {
+                    "b_user_id": row["user_id"],
+                    "b_games": row["actual"][0],
+                    "b_correct": row["actual"][1],
+                }
+                for row in mismatches
+            ],
+        )
+        db.commit()
+        logger.info(f"Исправлены счетчики игр пользователей: {len(mismatches)}")
+    return mismatches
+
+
 def get_users_statistics(db: Session) -> Dict[str, Any]:
     """
     Получает статистику по пользователям системы.
@@ -229,6 +436,7 @@ def create_word(db: Session, **kwargs) -> Word:
     db.add(word)
     db.commit()
     db.refresh(word)
+    word_pool.invalidate()
     return word
 
 
@@ -237,113 +445,388 @@ def get_random_words(
     user_id: int,
     count: int = 5,
     difficulty: Optional[str] = None,
-    excluded_ids: List[int] = None,
-) -> List[Word]:
-    """Gets random words for a game, always returning requested count of words"""
+    excluded_ids: Optional[Collection[int]] = None,
+    weighted: bool = False,
+) -> List[WordRecord]:
+    """
+    Gets random words for a game, always returning requested count of words.
 
-    query = db.query(Word)
+    Слова выбираются из пула в памяти процесса (app.word_pool), поэтому выбор
+    не зависит от размера словаря. При weighted=True чаще выбираются слова,
+    на которые часто ошибаются (app.word_weights). Показ слова учитывается
+    при ответе на него (apply_answer_batch), а не при выборе: раунды,
+    подготовленные заранее и не сыгранные, счетчики не меняют.
+    """
+    if weighted:
+        return word_sampler.sample(db, user_id, count, difficulty, excluded_ids)
+    return word_pool.sample(db, count, difficulty, excluded_ids)
 
-    if difficulty:
-        query = query.filter(Word.difficulty == difficulty)
 
-    # Применяем исключения только если после этого останутся слова
-    if excluded_ids:
-        # Сначала проверим, сколько всего подходящих слов
-        total_words = query.count()
+def get_distractor_translations(
+    db: Session, words: Sequence[WordRecord], count: int
+) -> List[str]:
+    """
+    Лишние варианты перевода для "Сопоставления": переводы других слов той же
+    сложности, не совпадающие с правильными ответами раунда.
+    """
+    if not words:
+        return []
+    return word_pool.sample_translations(
+        db, count, words[0].difficulty, excluded_ids={word.id for word in words}
+    )
 
-        # Проверим, сколько слов останется после исключения
-        remaining_words = query.filter(~Word.id.in_(excluded_ids)).count()
 
-        # Применяем фильтр только если останется достаточно слов
-        if remaining_words >= count:
-            query = query.filter(~Word.id.in_(excluded_ids))
+class ExperienceAward(NamedTuple):
+    """Итог начисления опыта (значения строки пользователя после обновления)."""
 
-    available_words = query.all()
+    experience: int
+    level: int
+    daily_experience: int
+    total_points: int
+    # Сколько опыта начислено фактически (с учетом дневного лимита)
+    gained: int
 
-    # Если доступно слишком мало слов - берем все что есть
-    if len(available_words) <= count:
-        selected_words = available_words
-    else:
-        selected_words = random.sample(available_words, count)
 
-    for word in selected_words:
-        word.times_shown += 1
-        word.last_used_at = datetime.now(timezone.utc)
+def _experience_award_values(
+    exp_points: int, daily_exp_limit: int, exp_for_level_up: int, now: datetime
+) -> Dict[str, Any]:
+    """
+    Значения SET для начисления опыта, вычисляемые в БД по текущей строке.
 
-    db.commit()
-    return selected_words
+    Сброс дневного счетчика в новый день, дневной лимит и повышение уровня
+    (сразу на несколько уровней, без цикла) выражены через CASE, поэтому
+    результат не зависит от того, что прочитал процесс.
+    """
+    day_start = datetime.combine(now.date(), time.min, tzinfo=timezone.utc)
+    # Новый день - счетчик дневного опыта начинается с нуля
+    daily_base = case(
+        (User.daily_experience_updated_at < day_start, 0),
+        else_=func.coalesce(User.daily_experience, 0),
+    )
+    if daily_exp_limit > 0:  # 0 = без ограничений
+        available = daily_exp_limit - daily_base
+        gained = case(
+            (available <= 0, 0), (available < exp_points, available), else_=exp_points
+        )
+        daily = daily_base + gained
+    else:
+        gained = literal(exp_points)
+        daily = daily_base
+
+    experience = func.coalesce(User.experience, 0) + gained
+    values: Dict[str, Any] = {
+        "daily_experience": daily,
+        "daily_experience_updated_at": now,
+        "total_points": func.coalesce(User.total_points, 0) + gained,
+        "experience": experience,
+    }
+    if exp_for_level_up > 0:
+        level_up = experience >= exp_for_level_up
+        values["level"] = User.level + case(
+            (level_up, experience // exp_for_level_up), else_=0
+        )
+        values["experience"] = case((level_up, experience % exp_for_level_up), else_=experience)
+    return values
+
+
+def _lock_user_row(db: Session, user_id: int, columns: Sequence[Any]):
+    """Блокирует строку пользователя до конца транзакции и читает columns."""
+    query = select(*columns).where(User.id == user_id)
+    if db.get_bind().dialect.name != "sqlite":
+        return db.execute(query.with_for_update()).first()
+    # В SQLite нет FOR UPDATE: пустой UPDATE захватывает блокировку записи БД.
+    # Это первая запись транзакции, поэтому параллельное начисление ждет
+    # блокировку в пределах busy_timeout, а не получает отказ
+    db.execute(
+        update(User)
+        .where(User.id == user_id)
+        .values(level=User.level)
+        .execution_options(synchronize_session=False)
+    )
+    return db.execute(query).first()
 
 
-def add_user_experience(db: Session, user_id: int, exp_points: int) -> Tuple[User, bool, bool]:
+def add_user_experience(
+    db: Session, user_id: int, exp_points: int
+) -> Tuple[Optional[ExperienceAward], bool, bool]:
     """
     Добавление очков опыта пользователю и проверка на повышение уровня.
-    Возвращает кортеж: (пользователь, был_ли_повышен_уровень, достигнут_ли_дневной_лимит)
-    """
-    user = get_user(db, user_id)
-    if not user:
-        return None, False, False
 
-    # Получаем настройки
+    Начисление выполняется одним UPDATE ... RETURNING, все вычисления - в БД
+    (_experience_award_values). Строка пользователя перед этим блокируется
+    (SELECT ... FOR UPDATE, в SQLite - блокировка записи): прежние значения
+    нужны для флагов ответа. Параллельные начисления одному пользователю
+    не теряются и не превышают дневной лимит.
+
+    Транзакция сессии фиксируется здесь.
+    Возвращает кортеж: (итог начисления, был_ли_повышен_уровень, достигнут_ли_дневной_лимит)
+    """
     daily_exp_limit = get_game_setting_int(db, "daily_experience_limit", 200)
     exp_for_level_up = get_game_setting_int(db, "points_for_level_up", 100)
 
-    # Проверяем, нужно ли сбросить счетчик дневного опыта
-    today = datetime.now(timezone.utc).date()
-    if user.daily_experience_updated_at:
-        last_update_date = user.daily_experience_updated_at.date()
-        if last_update_date < today:
-            # Новый день - сбрасываем счетчик
-            user.daily_experience = 0
-
-    # Проверяем, достигнут ли дневной лимит
-    daily_limit_reached = False
-    if daily_exp_limit > 0:  # Если лимит установлен (0 = без ограничений)
-        # Сколько опыта можно добавить в пределах лимита
-        available_exp = daily_exp_limit - user.daily_experience
-        if available_exp <= 0:
-            # Лимит уже достигнут
-            daily_limit_reached = True
-            exp_to_add = 0
-        else:
-            # Можно добавить в пределах лимита
-            exp_to_add = min(exp_points, available_exp)
-            user.daily_experience += exp_to_add
+    returned = (User.experience, User.level, User.daily_experience, User.total_points)
+
+    old = _lock_user_row(db, user_id, (User.level, User.total_points))
+    if old is None:
+        db.rollback()
+        return None, False, False
+
+    stmt = (
+        update(User)
+        .where(User.id == user_id)
+        .values(
+            _experience_award_values(
+                exp_points, daily_exp_limit, exp_for_level_up, datetime.now(timezone.utc)
+            )
+        )
+        .execution_options(synchronize_session=False)
+    )
+    if db.get_bind().dialect.update_returning:
+        new = db.execute(stmt.returning(*returned)).first()
     else:
-        # Нет лимита
-        exp_to_add = exp_points
+        db.execute(stmt)
+        new = db.execute(select(*returned).where(User.id == user_id)).first()
+    db.commit()
+    identity_cache.invalidate(user_id)
 
-    # Обновляем время последнего обновления
-    user.daily_experience_updated_at = datetime.now(timezone.utc)
+    award = ExperienceAward(*new, gained=new.total_points - (old.total_points or 0))
+    level_up = award.level > old.level
+    # Лимит был исчерпан еще до начисления: опыт не добавлен, а счетчик не ниже лимита
+    daily_limit_reached = (
+        daily_exp_limit > 0 and award.gained == 0 and award.daily_experience >= daily_exp_limit
+    )
+    return award, level_up, daily_limit_reached
 
-    # Добавляем опыт и обновляем общее количество очков
-    user.experience += exp_to_add
-    user.total_points += exp_to_add
 
-    # Проверяем, достаточно ли опыта для повышения уровня
-    level_up = False
-    while user.experience >= exp_for_level_up:
-        user.experience -= exp_for_level_up
-        user.level += 1
-        level_up = True
+def apply_answer_batch(
+    db: Session,
+    answers: Sequence[AnswerEvent],
+    shown: Dict[int, int],
+    last_used: Dict[int, datetime],
+) -> None:
+    """
+    Записывает пачку ответов и приращений счетчиков слов одной транзакцией.
 
+    Используется буфером отложенной записи (app.write_behind). Каждый ответ
+    учитывается как показ слова (times_shown, last_used_at) в дополнение
+    к переданным приращениям.
+
+    Args:
+        answers: Ответы пользователей для user_word_history
+        shown: Приращения times_shown по ID слова
+        last_used: Время последнего показа по ID слова
+    """
+    # Агрегат обновляем до записи истории: по ней определяется счетчик пользователей
+    by_user: Dict[int, List[Tuple[int, str, bool, datetime]]] = {}
+    for event in answers:
+        by_user.setdefault(event.user_id, []).append(
+            (event.word_id, event.game_type, event.correct, event.used_at)
+        )
+    for user_id, user_answers in by_user.items():
+        record_word_usage(db, user_id, user_answers)
+    record_user_word_stats(db, answers)
+    record_reviews(db, answers)
+
+    if answers:
+        db.execute(insert(UserWordHistory), [event._asdict() for event in answers])
+
+    shown_deltas = dict(shown)
+    last_used = dict(last_used)
+    correct_deltas: Dict[int, int] = {}
+    for event in answers:
+        shown_deltas[event.word_id] = shown_deltas.get(event.word_id, 0) + 1
+        if last_used.get(event.word_id) is None or last_used[event.word_id] < event.used_at:
+            last_used[event.word_id] = event.used_at
+        if event.correct:
+            correct_deltas[event.word_id] = correct_deltas.get(event.word_id, 0) + 1
+
+    apply_word_stat_deltas(db, shown_deltas, correct_deltas, last_used)
     db.commit()
-    db.refresh(user)
-    return user, level_up, daily_limit_reached
+
+
+def apply_word_stat_deltas(
+    db: Session,
+    shown: Dict[int, int],
+    correct: Dict[int, int],
+    last_used: Optional[Dict[int, datetime]] = None,
+) -> None:
+    """
+    Атомарно применяет приращения счетчиков слов.
+
+    Одна инструкция UPDATE ... SET x = x + :d (executemany по всем словам),
+    correct_ratio пересчитывается в той же инструкции. Коммит выполняет вызывающий код.
+
+    Args:
+        shown: Приращения times_shown по ID слова
+        correct: Приращения times_correct по ID слова
+        last_used: Время последнего показа по ID слова (не меняется, если не задано)
+    """
+    last_used = last_used or {}
+    params = [
+        {
+            "b_word_id": word_id,
+            "b_shown": shown.get(word_id, 0),
+            "b_correct": correct.get(word_id, 0),
+            "b_last_used": last_used.get(word_id),
+        }
+        for word_id in sorted(set(shown) | set(correct))  # Единый порядок блокировок
+    ]
+    if not params:
+        return
+
+    table = Word.__table__
+    new_shown = table.c.times_shown + bindparam("b_shown")
+    new_correct = table.c.times_correct + bindparam("b_correct")
+    stmt = (
+        update(table)
+        .where(table.c.id == bindparam("b_word_id"))
+        .values(
+            times_shown=new_shown,
+            times_correct=new_correct,
+            correct_ratio=case((new_shown > 0, new_correct * 1.0 / new_shown), else_=0.0),
+            last_used_at=func.coalesce(
+                bindparam("b_last_used", type_=UTCDateTime), table.c.last_used_at
+            ),
+        )
+    )
+    db.execute(stmt, params)
+    word_sampler.observe(shown, correct)
 
 
 def update_word_stats(db: Session, word_id: int, correct: bool) -> None:
     """Обновление статистики слова после ответа пользователя."""
-    word = db.query(Word).filter(Word.id == word_id).first()
-    if word:
-        if correct:
-            word.times_correct += 1
-        db.commit()
+    now = datetime.now(timezone.utc)
+    apply_word_stat_deltas(db, {word_id: 1}, {word_id: 1 if correct else 0}, {word_id: now})
+    db.commit()
+
+
+def recompute_word_ratios(db: Session) -> int:
+    """
+    Пересчитывает correct_ratio для всех слов по times_correct / times_shown.
+
+    Returns:
+        int: Количество обновленных слов
+    """
+    result = db.execute(
+        update(Word).values(
+            correct_ratio=case(
+                (Word.times_shown > 0, Word.times_correct * 1.0 / Word.times_shown),
+                else_=0.0,
+            )
+        )
+    )
+    db.commit()
+    logger.info(f"correct_ratio пересчитан для {result.rowcount} слов")
+    return result.rowcount
+
+
+def get_daily_usage_stats(db: Session, days: int = 30) -> List[Dict[str, Any]]:
+    """
+    Статистика ответов по дням за последние days дней (от сегодняшнего дня назад).
+
+    Читается из дневного агрегата word_usage_daily одним сгруппированным запросом,
+    дни без ответов заполняются нулями.
+    """
+    current_date = datetime.now(timezone.utc).date()
+    first_date = current_date - timedelta(days=days - 1)
+
+    rows = (
+        db.query(
+            WordUsageDaily.date,
+            func.sum(WordUsageDaily.shown),
+            func.sum(WordUsageDaily.correct),
+        )
+        .filter(WordUsageDaily.date >= first_date, WordUsageDaily.date <= current_date)
+        .group_by(WordUsageDaily.date)
+        .all()
+    )
+    totals = {day: (count or 0, correct or 0) for day, count, correct in rows}
+
+    usage_stats = []
+    for days_back in range(days):
+        date = current_date - timedelta(days=days_back)
+        count, correct = totals.get(date, (0, 0))
+        usage_stats.append(
+            {
+                "date": date.strftime("%Y-%m-%d"),
+                "total": count,
+                "correct": correct,
+                "ratio": correct / count if count > 0 else 0,
+            }
+        )
+    return usage_stats
+
+
+def _get_word_usage_ranking(
+    db: Session, days: int, problematic: bool, limit: int = 10
+) -> List[Dict[str, Any]]:
+    """
+    Рейтинг слов по агрегату за последние days дней.
+
+    problematic=False - самые используемые слова,
+    problematic=True - слова с наихудшим процентом правильных ответов (минимум 5 показов).
+    """
+    first_date = datetime.now(timezone.utc).date() - timedelta(days=days - 1)
+    shown = func.sum(WordUsageDaily.shown)
+    correct = func.sum(WordUsageDaily.correct)
+    ratio = correct * 1.0 / shown
+
+    query = (
+        db.query(WordUsageDaily.word_id, Word.text, shown, correct)
+        .join(Word, Word.id == WordUsageDaily.word_id)
+        .filter(WordUsageDaily.date >= first_date)
+        .group_by(WordUsageDaily.word_id, Word.text)
+    )
+    if problematic:
+        query = query.having(shown >= 5).order_by(asc(ratio))
+    else:
+        query = query.order_by(desc(shown))
+
+    return [
+        {
+            "id": word_id,
+            "text": text,
+            "times_shown": times_shown,
+            "correct_ratio": times_correct / times_shown if times_shown else 0.0,
+        }
+        for word_id, text, times_shown, times_correct in query.limit(limit).all()
+    ]
+
+
+def _get_word_counter_ranking(
+    db: Session, problematic: bool, limit: int = 10
+) -> List[Dict[str, Any]]:
+    """
+    Рейтинг слов по накопленным счетчикам times_shown / correct_ratio.
+
+    Оба запроса идут по индексам (ix_words_times_shown, ix_words_correct_ratio).
+    """
+    if problematic:
+        query = db.query(Word).filter(Word.times_shown >= 5).order_by(asc(Word.correct_ratio))
+    else:
+        query = db.query(Word).order_by(desc(Word.times_shown))
 
+    return [
+        {
+            "id": word.id,
+            "text": word.text,
+            "times_shown": word.times_shown,
+            "correct_ratio": word.correct_ratio,
+        }
+        for word in query.limit(limit).all()
+    ]
 
-def get_words_statistics(db: Session) -> Dict[str, Any]:
+
+def get_words_statistics(db: Session, days: int = 30) -> Dict[str, Any]:
     """
     Получает расширенную статистику по словам системы.
 
+    Статистика использования, самые используемые и проблемные слова
+    считаются по дневному агрегату word_usage_daily.
+
+    Args:
+        days: Количество дней, за которое считается статистика
+
     Returns:
         Словарь с различными статистическими показателями
     """
@@ -359,81 +842,452 @@ def get_words_statistics(db: Session) -> Dict[str, Any]:
 
     difficulty_distribution = {diff: count for diff, count in difficulty_stats}
 
-    # Наиболее часто используемые слова
-    most_used_words = db.query(Word).order_by(desc(Word.times_shown)).limit(10).all()
-
-    # Слова с наихудшим процентом правильных ответов (минимум 5 показов)
-    problematic_words = (
-        db.query(Word)
-        .filter(Word.times_shown >= 5)
-        .order_by(asc(Word.correct_ratio))
-        .limit(10)
-        .all()
+    # Слова, на которые еще никто не отвечал (проверка по индексу ix_user_word_stats_word)
+    unseen_words = (
+        db.query(func.count(Word.id))
+        .filter(~exists().where(UserWordStats.word_id == Word.id))
+        .scalar()
+        or 0
     )
 
+    # Наиболее часто используемые слова и слова с наихудшим процентом правильных ответов
+    most_used_words = _get_word_usage_ranking(db, days, problematic=False)
+    problematic_words = _get_word_usage_ranking(db, days, problematic=True)
+
+    # Агрегат за период пуст (например, еще не заполнен) - берем счетчики слов
+    if not most_used_words:
+        most_used_words = _get_word_counter_ranking(db, problematic=False)
+        problematic_words = _get_word_counter_ranking(db, problematic=True)
+
     # Статистика использования по дням
-    current_date = datetime.now(timezone.utc).date()
-    usage_stats = []
+    usage_stats = get_daily_usage_stats(db, days)
 
-    for days_back in range(30):
-        date = current_date - timedelta(days=days_back)
-        start_of_day = datetime.combine(date, time.min)
-        end_of_day = datetime.combine(date, time.max)
+    return {
+        "total_words": total_words,
+        "difficulty_distribution": difficulty_distribution,
+        "unseen_words": unseen_words,
+        "most_used_words": most_used_words,
+        "problematic_words": problematic_words,
+        "usage_stats": usage_stats,
+    }
+
+
+# === Дневной агрегат использования слов ===
 
-        count = (
-            db.query(func.count(UserWordHistory.id))
+
+def _dialect_insert(db: Session):
+    """Возвращает insert с поддержкой ON CONFLICT для текущего диалекта или None."""
+    dialect = db.get_bind().dialect.name
+    if dialect == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+
+        return insert
+    if dialect == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert
+
+        return insert
+    return None
+
+
+def record_word_usage(
+    db: Session,
+    user_id: int,
+    answers: Iterable[Tuple[int, str, bool, datetime]],
+) -> None:
+    """
+    Инкрементально обновляет word_usage_daily по ответам пользователя.
+
+    Вызывается в той же транзакции, что и запись UserWordHistory, но до добавления
+    новых записей истории: по истории за день определяется, встречался ли уже
+    этот пользователь у слова (счетчик users). Коммит выполняет вызывающий код.
+
+    Args:
+        answers: Кортежи (word_id, game_type, correct, used_at)
+    """
+    deltas: Dict[Tuple[Any, int, str], List[int]] = {}
+    for word_id, game_type, correct, used_at in answers:
+        delta = deltas.setdefault((used_at.date(), word_id, game_type), [0, 0, 0])
+        delta[0] += 1
+        delta[1] += 1 if correct else 0
+    if not deltas:
+        return
+
+    # Пользователь учитывается в users только при первом ответе на слово за день
+    for day in {key[0] for key in deltas}:
+        word_ids = [key[1] for key in deltas if key[0] == day]
+        seen = (
+            db.query(UserWordHistory.word_id, UserWordHistory.game_type)
             .filter(
-                UserWordHistory.used_at >= start_of_day,
-                UserWordHistory.used_at <= end_of_day,
+                UserWordHistory.user_id == user_id,
+                UserWordHistory.used_at >= datetime.combine(day, time.min),
+                UserWordHistory.used_at <= datetime.combine(day, time.max),
+                UserWordHistory.word_id.in_(word_ids),
             )
-            .scalar()
-            or 0
+            .distinct()
+            .all()
         )
+        seen = set(seen)
+        for key, delta in deltas.items():
+            if key[0] == day and (key[1], key[2]) not in seen:
+                delta[2] = 1
+
+    rows = [
+        {
+            "date": day,
+            "word_id": word_id,
+            "game_type": game_type,
+            "shown": shown,
+            "correct": correct,
+            "users": users,
+        }
+        for (day, word_id, game_type), (shown, correct, users) in deltas.items()
+    ]
+
+    dialect_insert = _dialect_insert(db)
+    if dialect_insert is None:
+        # Диалект без ON CONFLICT - обновляем построчно
+        for row in rows:
+            usage = db.get(WordUsageDaily, (row["date"], row["word_id"], row["game_type"]))
+            if usage:
+                usage.shown += row["shown"]
+                usage.correct += row["correct"]
+                usage.users += row["users"]
+            else:
+                db.add(WordUsageDaily(**row))
+        return
+
+    table = WordUsageDaily.__table__
+    stmt = dialect_insert(table).values(rows)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[table.c.date, table.c.word_id, table.c.game_type],
+        set_={
+            "shown": table.c.shown + stmt.excluded.shown,
+            "correct": table.c.correct + stmt.excluded.correct,
+            "users": table.c.users + stmt.excluded.users,
+        },
+    )
+    db.execute(stmt)
 
-        correct = (
-            db.query(func.count(UserWordHistory.id))
-            .filter(
-                UserWordHistory.used_at >= start_of_day,
-                UserWordHistory.used_at <= end_of_day,
-                UserWordHistory.correct == True,
-            )
-            .scalar()
-            or 0
+
+def rebuild_word_usage_daily(db: Session, days: Optional[int] = None) -> int:
+    """
+    Пересчитывает word_usage_daily по user_word_history.
+
+    Args:
+        days: Пересчитать только последние days дней (None - полностью)
+
+    Returns:
+        int: Количество строк агрегата после пересчета
+    """
+    day_column = func.date(UserWordHistory.used_at)
+    source = db.query(
+        day_column,
+        UserWordHistory.word_id,
+        UserWordHistory.game_type,
+        func.count(UserWordHistory.id),
+        func.sum(case((UserWordHistory.correct == True, 1), else_=0)),
+        func.count(UserWordHistory.user_id.distinct()),
+    )
+    cleanup = db.query(WordUsageDaily)
+
+    if days:
+        first_date = datetime.now(timezone.utc).date() - timedelta(days=days - 1)
+        source = source.filter(UserWordHistory.used_at >= datetime.combine(first_date, time.min))
+        cleanup = cleanup.filter(WordUsageDaily.date >= first_date)
+
+    source = source.group_by(day_column, UserWordHistory.word_id, UserWordHistory.game_type)
+
+    cleanup.delete(synchronize_session=False)
+    table = WordUsageDaily.__table__
+    db.execute(
+        table.insert().from_select(
+            ["date", "word_id", "game_type", "shown", "correct", "users"],
+            source.statement,
         )
+    )
+    db.commit()
 
-        usage_stats.append(
+    total = db.query(func.count()).select_from(WordUsageDaily).scalar() or 0
+    logger.info(f"Агрегат word_usage_daily пересчитан, строк: {total}")
+    return total
+
+
+def get_word_usage_trend(db: Session, word_id: int, days: int = 30) -> List[Dict[str, Any]]:
+    """Динамика ответов по одному слову за последние days дней (по всем типам игр)."""
+    current_date = datetime.now(timezone.utc).date()
+    first_date = current_date - timedelta(days=days - 1)
+
+    rows = (
+        db.query(
+            WordUsageDaily.date,
+            func.sum(WordUsageDaily.shown),
+            func.sum(WordUsageDaily.correct),
+            func.sum(WordUsageDaily.users),
+        )
+        .filter(WordUsageDaily.word_id == word_id, WordUsageDaily.date >= first_date)
+        .group_by(WordUsageDaily.date)
+        .all()
+    )
+    totals = {day: (shown or 0, correct or 0, users or 0) for day, shown, correct, users in rows}
+
+    trend = []
+    for days_back in range(days - 1, -1, -1):
+        date = current_date - timedelta(days=days_back)
+        shown, correct, users = totals.get(date, (0, 0, 0))
+        trend.append(
             {
                 "date": date.strftime("%Y-%m-%d"),
-                "total": count,
+                "shown": shown,
                 "correct": correct,
-                "ratio": correct / count if count > 0 else 0,
+                "users": users,
+                "ratio": correct / shown if shown > 0 else 0,
             }
         )
+    return trend
 
-    return {
-        "total_words": total_words,
-        "difficulty_distribution": difficulty_distribution,
-        "most_used_words": [
-            {
-                "id": word.id,
-                "text": word.text,
-                "times_shown": word.times_shown,
-                "correct_ratio": word.correct_ratio,
-            }
-            for word in most_used_words
-        ],
-        "problematic_words": [
+
+# === Итоги пользователя по словам ===
+
+
+def record_user_word_stats(db: Session, answers: Sequence[AnswerEvent]) -> None:
+    """
+    Инкрементально обновляет user_word_stats по ответам одним upsert.
+
+    Серия правильных ответов продолжается, только если в пачке не было ошибок
+    на это слово; иначе она равна числу правильных ответов после последней
+    ошибки. Коммит выполняет вызывающий код.
+    """
+    deltas: Dict[Tuple[int, int], Dict[str, Any]] = {}
+    for event in sorted(answers, key=lambda event: event.used_at):
+        delta = deltas.setdefault(
+            (event.user_id, event.word_id),
             {
-                "id": word.id,
-                "text": word.text,
-                "times_shown": word.times_shown,
-                "correct_ratio": word.correct_ratio,
-            }
-            for word in problematic_words
-        ],
-        "usage_stats": usage_stats,
+                "user_id": event.user_id,
+                "word_id": event.word_id,
+                "seen": 0,
+                "correct": 0,
+                "last_seen": None,
+                "streak": 0,
+            },
+        )
+        delta["seen"] += 1
+        delta["correct"] += 1 if event.correct else 0
+        delta["last_seen"] = event.used_at
+        delta["streak"] = delta["streak"] + 1 if event.correct else 0
+    if not deltas:
+        return
+    rows = list(deltas.values())
+
+    dialect_insert = _dialect_insert(db)
+    if dialect_insert is None:
+        # Диалект без ON CONFLICT - обновляем построчно
+        for row in rows:
+            stats = db.get(UserWordStats, (row["user_id"], row["word_id"]))
+            if stats:
+                stats.streak = (
+                    stats.streak + row["streak"] if row["correct"] == row["seen"] else row["streak"]
+                )
+                stats.seen += row["seen"]
+                stats.correct += row["correct"]
+                stats.last_seen = row["last_seen"]
+            else:
+                db.add(UserWordStats(**row))
+        return
+
+    table = UserWordStats.__table__
+    stmt = dialect_insert(table).values(rows)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[table.c.user_id, table.c.word_id],
+        set_={
+            "seen": table.c.seen + stmt.excluded.seen,
+            "correct": table.c.correct + stmt.excluded.correct,
+            "last_seen": stmt.excluded.last_seen,
+            # Без ошибок в пачке серия продолжается
+            "streak": case(
+                (
+                    stmt.excluded.correct == stmt.excluded.seen,
+                    table.c.streak + stmt.excluded.streak,
+                ),
+                else_=stmt.excluded.streak,
+            ),
+        },
+    )
+    db.execute(stmt)
+
+
+def rebuild_user_word_stats(db: Session) -> int:
+    """
+    Пересчитывает user_word_stats по user_word_history.
+
+    Returns:
+        int: Количество строк после пересчета
+    """
+    history = UserWordHistory.__table__
+    # Время последней ошибки: серия - правильные ответы после нее
+    last_wrong = (
+        select(
+            history.c.user_id,
+            history.c.word_id,
+            func.max(history.c.used_at).label("used_at"),
+        )
+        .where(history.c.correct == False)
+        .group_by(history.c.user_id, history.c.word_id)
+        .subquery()
+    )
+    source = (
+        select(
+            history.c.user_id,
+            history.c.word_id,
+            func.count(history.c.id),
+            func.sum(case((history.c.correct == True, 1), else_=0)),
+            func.max(history.c.used_at),
+            func.sum(
+                case(
+                    (
+                        (history.c.correct == True)
+                        & (
+                            (last_wrong.c.used_at == None)
+                            | (history.c.used_at > last_wrong.c.used_at)
+                        ),
+                        1,
+                    ),
+                    else_=0,
+                )
+            ),
+        )
+        .select_from(
+            history.outerjoin(
+                last_wrong,
+                (last_wrong.c.user_id == history.c.user_id)
+                & (last_wrong.c.word_id == history.c.word_id),
+            )
+        )
+        .group_by(history.c.user_id, history.c.word_id)
+    )
+
+    db.query(UserWordStats).delete(synchronize_session=False)
+    db.execute(
+        UserWordStats.__table__.insert().from_select(
+            ["user_id", "word_id", "seen", "correct", "last_seen", "streak"], source
+        )
+    )
+    db.commit()
+
+    total = db.query(func.count()).select_from(UserWordStats).scalar() or 0
+    logger.info(f"Таблица user_word_stats пересчитана, строк: {total}")
+    return total
+
+
+# === Интервальное повторение ===
+
+# Сколько записей очереди просматривать на одно нужное слово (фильтр сложности и исключений)
+DUE_SCAN_FACTOR = 3
+
+
+def record_reviews(db: Session, answers: Sequence[AnswerEvent]) -> None:
+    """
+    Обновляет расписание повторения (word_reviews) по ответам.
+
+    Состояния читаются одним запросом, записываются одним upsert.
+    Коммит выполняет вызывающий код.
+    """
+    if not answers:
+        return
+
+    user_ids = {event.user_id for event in answers}
+    word_ids = {event.word_id for event in answers}
+    states: Dict[Tuple[int, int], ReviewState] = {
+        (user_id, word_id): ReviewState(repetitions, interval_days, ease)
+        for user_id, word_id, repetitions, interval_days, ease in db.query(
+            WordReview.user_id,
+            WordReview.word_id,
+            WordReview.repetitions,
+            WordReview.interval_days,
+            WordReview.ease,
+        ).filter(WordReview.user_id.in_(user_ids), WordReview.word_id.in_(word_ids))
     }
 
+    reviews: Dict[Tuple[int, int], Dict[str, Any]] = {}
+    for event in sorted(answers, key=lambda event: event.used_at):
+        key = (event.user_id, event.word_id)
+        state, due_at = next_review(states.get(key, INITIAL_STATE), event.correct, event.used_at)
+        states[key] = state
+        reviews[key] = {
+            "user_id": event.user_id,
+            "word_id": event.word_id,
+            **state._asdict(),
+            "due_at": due_at,
+            "last_reviewed_at": event.used_at,
+        }
+    rows = list(reviews.values())
+
+    dialect_insert = _dialect_insert(db)
+    if dialect_insert is None:
+        # Диалект без ON CONFLICT - обновляем построчно
+        for row in rows:
+            db.merge(WordReview(**row))
+        return
+
+    table = WordReview.__table__
+    stmt = dialect_insert(table).values(rows)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[table.c.user_id, table.c.word_id],
+        set_={
+            column: stmt.excluded[column]
+            for column in ("repetitions", "interval_days", "ease", "due_at", "last_reviewed_at")
+        },
+    )
+    db.execute(stmt)
+
+
+def get_due_words(
+    db: Session,
+    user_id: int,
+    count: int,
+    difficulty: Optional[str] = None,
+    excluded_ids: Optional[Collection[int]] = None,
+) -> List[WordRecord]:
+    """
+    Слова, которые пользователю пора повторить: самые просроченные первыми.
+
+    Один проход по индексу ix_word_reviews_user_due, ограниченный count,
+    поэтому стоимость не зависит от объема истории пользователя.
+    Пропускаются слова, на которые пользователь ответил после последнего
+    пересчета расписания: ответ еще в очереди отложенной записи, и due_at
+    в БД пока прежний.
+    """
+    if count <= 0:
+        return []
+
+    due = db.execute(
+        select(WordReview.word_id, WordReview.last_reviewed_at)
+        .where(WordReview.user_id == user_id, WordReview.due_at <= datetime.now(timezone.utc))
+        .order_by(WordReview.due_at)
+        .limit(count * DUE_SCAN_FACTOR)
+    ).all()
+    last_used = recent_words.get_last_used(db, user_id)
+
+    excluded: Collection[int] = excluded_ids or ()
+    selected: List[WordRecord] = []
+    for word_id, last_reviewed_at in due:
+        if word_id in excluded:
+            continue
+        if word_id in last_used:
+            # Значения столбца без пояса - время UTC
+            reviewed = (
+                last_reviewed_at.replace(tzinfo=timezone.utc).timestamp()
+                if last_reviewed_at
+                else 0.0
+            )
+            if last_used[word_id] > reviewed:
+                continue
+        record = word_pool.get(db, word_id)
+        if record is not None and (not difficulty or record.difficulty == difficulty):
+            selected.append(record)
+            if len(selected) == count:
+                break
+    return selected
+
 
 # === Игровые сессии ===
 
@@ -442,6 +1296,7 @@ def create_game_session(db: Session, user_id: int, game_type: str) -> GameSessio
     """Создание новой игровой сессии."""
     session = GameSession(user_id=user_id, game_type=game_type)
     db.add(session)
+    db.execute(_game_counters_update(user_id, total_games=1))
     db.commit()
     db.refresh(session)
     return session
@@ -451,8 +1306,13 @@ def complete_game_session(
     db: Session, session_id: int, score: int, correct_answers: int, total_questions: int
 ) -> GameSession:
     """Завершение игровой сессии и запись результатов."""
-    session = db.query(GameSession).filter(GameSession.id == session_id).first()
+    # Строка сессии блокируется до коммита: повторные завершения идут по очереди
+    session = (
+        db.query(GameSession).filter(GameSession.id == session_id).with_for_update().first()
+    )
     if session:
+        if session.user_id is not None:
+            db.execute(_correct_answers_update(session, correct_answers))
         session.score = score
         session.correct_answers = correct_answers
         session.total_questions = total_questions
@@ -474,39 +1334,113 @@ def get_user_game_history(db: Session, user_id: int, limit: int = 10) -> List[Ga
     )
 
 
+# === Асинхронные версии для игрового API ===
+# Сложная логика остается в синхронных функциях: AsyncSession.run_sync выполняет
+# их поверх асинхронного драйвера, не блокируя цикл событий.
+
+
+async def get_random_words_async(
+    db: AsyncSession,
+    user_id: int,
+    count: int = 5,
+    difficulty: Optional[str] = None,
+    excluded_ids: Optional[Collection[int]] = None,
+    weighted: bool = False,
+) -> List[WordRecord]:
+    """Асинхронная версия get_random_words (БД нужна только для загрузки пула)."""
+    return await db.run_sync(
+        get_random_words, user_id, count, difficulty, excluded_ids, weighted
+    )
+
+
+async def create_game_session_async(db: AsyncSession, user_id: int, game_type: str) -> GameSession:
+    """Создание новой игровой сессии."""
+    session = GameSession(user_id=user_id, game_type=game_type)
+    db.add(session)
+    await db.execute(_game_counters_update(user_id, total_games=1))
+    await db.commit()
+    return session
+
+
+async def complete_game_session_async(
+    db: AsyncSession, session_id: int, score: int, correct_answers: int, total_questions: int
+) -> Optional[GameSession]:
+    """Завершение игровой сессии и запись результатов."""
+    # Строка сессии блокируется до коммита: повторные завершения идут по очереди
+    session = await db.get(
+        GameSession, session_id, with_for_update=True, populate_existing=True
+    )
+    if session:
+        if session.user_id is not None:
+            await db.execute(_correct_answers_update(session, correct_answers))
+        session.score = score
+        session.correct_answers = correct_answers
+        session.total_questions = total_questions
+        session.completed_at = datetime.now(timezone.utc)
+
+        await db.commit()
+    return session
+
+
+async def add_user_experience_async(
+    db: AsyncSession, user_id: int, exp_points: int
+) -> Tuple[Optional[ExperienceAward], bool, bool]:
+    """Асинхронная версия add_user_experience."""
+    return await db.run_sync(add_user_experience, user_id, exp_points)
+
+
+async def get_game_setting_int_async(db: AsyncSession, key: str, default: int = 0) -> int:
+    """Числовая настройка игры (из кэша; БД читается только при его обновлении)."""
+    return await db.run_sync(get_game_setting_int, key, default)
+
+
+async def get_game_setting_bool_async(
+    db: AsyncSession, key: str, default: bool = False
+) -> bool:
+    """Логическая настройка игры (из кэша)."""
+    return await db.run_sync(get_game_setting_bool, key, default)
+
+
+async def count_words_async(db: AsyncSession) -> int:
+    """Количество слов в словаре."""
+    return await db.scalar(select(func.count(Word.id)))
+
+
 # === Настройки игры ===
 
 
 def get_game_setting(db: Session, key: str, default: str = "") -> str:
-    """Получение настройки игры по ключу."""
-    setting = db.query(GameSetting).filter(GameSetting.key == key).first()
-    return setting.value if setting else default
+    """Получение настройки игры по ключу (из кэша настроек)."""
+    return game_settings_cache.get(db, key, default)
 
 
 def get_game_setting_int(db: Session, key: str, default: int = 0) -> int:
     """Получение числовой настройки игры по ключу."""
-    value = get_game_setting(db, key, str(default))
-    try:
-        return int(value)
-    except (ValueError, TypeError):
-        return default
+    return game_settings_cache.get_int(db, key, default)
+
+
+def get_game_setting_bool(db: Session, key: str, default: bool = False) -> bool:
+    """Получение логической настройки игры по ключу ("1"/"0")."""
+    return game_settings_cache.get_bool(db, key, default)
 
 
 def set_game_setting(db: Session, key: str, value: str) -> GameSetting:
     """Установка настройки игры."""
+    version = game_settings_cache.next_generation(db)
     setting = db.query(GameSetting).filter(GameSetting.key == key).first()
     if setting:
         setting.value = value
+        setting.version = version
     else:
-        setting = GameSetting(key=key, value=value)
+        setting = GameSetting(key=key, value=value, version=version)
         db.add(setting)
 
     db.commit()
     db.refresh(setting)
+    game_settings_cache.invalidate()
     return setting
 
 
 def get_all_game_settings(db: Session) -> Dict[str, str]:
     """Получение всех настроек игры."""
-    settings = db.query(GameSetting).all()
-    return {setting.key: setting.value for setting in settings}
+    return game_settings_cache.get_all(db)
@@ -0,0 +1,179 @@
+"""
+Настройки и метрики пула соединений с базой данных.
+
+Параметры пула берутся из Settings (DB_POOL_*), а незаданные значения -
+из значений по умолчанию для диалекта. Пул с инструментированием
+замеряет время получения соединения (_do_get): ожидание свободного
+соединения и открытие нового входят в это время.
+"""
+
+import logging
+import threading
+import time
+from bisect import bisect_left
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy.engine import Engine, make_url
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Границы корзин гистограммы ожидания соединения, мс
+WAIT_BUCKETS_MS = (1, 5, 10, 25, 50, 100, 250, 500, 1000, 5000)
+
+# Значения по умолчанию для диалектов, если параметр не задан в настройках
+DIALECT_POOL_DEFAULTS: Dict[str, Dict[str, Any]] = {
+    "postgresql": {
+        "pool_size": 10,
+        "max_overflow": 10,
+        "pool_recycle": 1800,
+        "pool_pre_ping": True,
+    },
+    # Файловая SQLite: соединения дешевые, сервер не разрывает их по таймауту
+    "sqlite": {
+        "pool_size": 5,
+        "max_overflow": 10,
+        "pool_recycle": -1,
+        "pool_pre_ping": False,
+    },
+}
+
+
+class PoolWaitStats:
+    """Счетчики и гистограмма времени получения соединения из пула."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.buckets = [0] * (len(WAIT_BUCKETS_MS) + 1)
+        self.checkouts = 0
+        self.timeouts = 0
+        self.total_wait_ms = 0.0
+        self.max_wait_ms = 0.0
+
+    def observe(self, wait_ms: float) -> None:
+        with self._lock:
+            self.buckets[bisect_left(WAIT_BUCKETS_MS, wait_ms)] += 1
+            self.checkouts += 1
+            self.total_wait_ms += wait_ms
+            self.max_wait_ms = max(self.max_wait_ms, wait_ms)
+
+    def observe_timeout(self) -> None:
+        with self._lock:
+            self.timeouts += 1
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            labels = [f"le_{bound}ms" for bound in WAIT_BUCKETS_MS] + ["inf"]
+            return {
+                "checkouts_total": self.checkouts,
+                "timeouts_total": self.timeouts,
+                "avg_wait_ms": self.total_wait_ms / self.checkouts if self.checkouts else 0.0,
+                "max_wait_ms": self.max_wait_ms,
+                "wait_histogram": dict(zip(labels, self.buckets)),
+            }
+
+
+# Метрики по имени пула: переживают пересоздание пула (engine.dispose)
+_wait_stats: Dict[str, PoolWaitStats] = {}
+_wait_stats_lock = threading.Lock()
+
+
+def get_wait_stats(name: str) -> PoolWaitStats:
+    with _wait_stats_lock:
+        stats = _wait_stats.get(name)
+        if stats is None:
+            stats = _wait_stats[name] = PoolWaitStats()
+        return stats
+
+
+class _InstrumentedPoolMixin:
+    """Замеряет получение соединения из пула."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.wait_stats = get_wait_stats(kwargs.get("logging_name") or "default")
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            connection = super()._do_get()
+        except PoolTimeoutError:
+            self.wait_stats.observe_timeout()
+            raise
+        self.wait_stats.observe((time.perf_counter() - started) * 1000)
+        return connection
+
+
+class InstrumentedQueuePool(_InstrumentedPoolMixin, QueuePool):
+    """QueuePool с метриками ожидания (синхронный движок)."""
+
+
+class InstrumentedAsyncQueuePool(_InstrumentedPoolMixin, AsyncAdaptedQueuePool):
+    """AsyncAdaptedQueuePool с метриками ожидания (асинхронный движок)."""
+
+
+def _setting_or_default(value: Optional[Any], defaults: Dict[str, Any], key: str) -> Any:
+    return defaults[key] if value is None else value
+
+
+def pool_options(url: str, name: str, is_async: bool = False) -> Dict[str, Any]:
+    """
+    Параметры create_engine для пула соединений.
+
+    SQLite в памяти использует собственный пул SQLAlchemy (одно соединение),
+    поэтому для нее параметры не задаются.
+    """
+    parsed = make_url(url)
+    backend = parsed.get_backend_name()
+    if backend == "sqlite" and parsed.database in (None, "", ":memory:"):
+        return {}
+
+    defaults = DIALECT_POOL_DEFAULTS.get(backend, DIALECT_POOL_DEFAULTS["postgresql"])
+    return {
+        "poolclass": InstrumentedAsyncQueuePool if is_async else InstrumentedQueuePool,
+        "pool_logging_name": name,
+        "pool_size": _setting_or_default(settings.DB_POOL_SIZE, defaults, "pool_size"),
+        "max_overflow": _setting_or_default(settings.DB_MAX_OVERFLOW, defaults, "max_overflow"),
+        "pool_timeout": settings.DB_POOL_TIMEOUT,
+        "pool_recycle": _setting_or_default(settings.DB_POOL_RECYCLE, defaults, "pool_recycle"),
+        "pool_pre_ping": _setting_or_default(
+            settings.DB_POOL_PRE_PING, defaults, "pool_pre_ping"
+        ),
+    }
+
+
+def pool_stats(engine: Engine) -> Dict[str, Any]:
+    """Текущее состояние пула движка и метрики ожидания соединений."""
+    pool = engine.pool
+    result: Dict[str, Any] = {"pool_class": type(pool).__name__}
+    if isinstance(pool, QueuePool):
+        result.update(
+            {
+                "size": pool.size(),
+                "checked_out": pool.checkedout(),
+                "checked_in": pool.checkedin(),
+                "overflow": pool.overflow(),
+                "max_overflow": pool._max_overflow,
+                "timeout": pool.timeout(),
+            }
+        )
+    stats: Optional[PoolWaitStats] = getattr(pool, "wait_stats", None)
+    if stats is not None:
+        result.update(stats.snapshot())
+    return result
+
+
+def describe_pools(engines: List[Engine]) -> None:
+    """Пишет в лог параметры пулов (для расчета max_connections на все воркеры)."""
+    for engine in engines:
+        pool = engine.pool
+        if isinstance(pool, QueuePool):
+            logger.info(
+                f"Пул соединений {pool.logging_name or type(pool).__name__}: "
+                f"pool_size={pool.size()}, max_overflow={pool._max_overflow}, "
+                f"timeout={pool.timeout()}s - до {pool.size() + pool._max_overflow} "
+                f"соединений на процесс"
+            )
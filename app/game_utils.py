@@ -1,14 +1,65 @@
 import random
 import logging
+import threading
+from collections import OrderedDict, deque
+from typing import Any, Deque, Dict, Iterable, List, Optional, Sequence
+
+import numpy as np
+
+from app.config import settings
 
 # Настройка логгера
 logger = logging.getLogger(__name__)
 
 
+def _scramble_sources(word: str) -> List[int]:
+    """
+    Строит перестановку позиций слова с минимальным числом совпадающих букв.
+
+    Для каждой позиции возвращает индекс буквы исходного слова, которая на нее встанет.
+    Позиции группируются по буквам (группы в случайном порядке, внутри группы -
+    перемешаны) и сдвигаются по кругу на s, где m <= s <= n - m, а m - размер
+    наибольшей группы. Такой сдвиг никогда не переводит позицию в позицию с той же
+    буквой, поэтому при m <= n / 2 получается полная перестановка без совпадений.
+    Если одна буква занимает больше половины слова, 2m - n ее позиций остаются
+    на месте (меньше совпадений получить невозможно), остальные переставляются.
+    Работает за линейное время от длины слова.
+    """
+    size = len(word)
+    groups: Dict[str, List[int]] = {}
+    for position, char in enumerate(word):
+        groups.setdefault(char, []).append(position)
+
+    order = list(groups.values())
+    random.shuffle(order)
+    largest = max(order, key=len)
+    largest_size = len(largest)
+
+    sources = list(range(size))
+    if 2 * largest_size > size:
+        # Лишние повторы самой частой буквы оставляем на своих местах
+        random.shuffle(largest)
+        del largest[: 2 * largest_size - size]
+        largest_size = size - largest_size
+
+    positions: List[int] = []
+    for group in order:
+        random.shuffle(group)
+        positions.extend(group)
+
+    cycle = len(positions)
+    if cycle:
+        shift = random.randint(largest_size, cycle - largest_size)
+        for index, position in enumerate(positions):
+            sources[position] = positions[(index + shift) % cycle]
+    return sources
+
+
 def create_scrambled_word(word, max_match_percentage=30):
     """
     Создает перемешанную версию слова с контролем процента совпадающих позиций букв.
-    Полностью итеративный подход без рекурсии.
+    Повторяющиеся буквы учитываются: совпадений столько, сколько неизбежно
+    (0, если ни одна буква не занимает больше половины слова).
 
     Args:
         word (str): Исходное слово для перемешивания
@@ -21,96 +72,265 @@ def create_scrambled_word(word, max_match_percentage=30):
     if not word or len(word) <= 1:
         return word
 
-    # Функция вычисления процента совпадений без вложенности
-    def calc_matches(orig, scramb):
-        matches = 0
-        for i in range(len(orig)):
-            if orig[i] == scramb[i]:
-                matches += 1
-        return (matches / len(orig)) * 100
-
-    # Начальное перемешивание слова
-    char_list = list(word)
-    random.shuffle(char_list)
-    current_result = "".join(char_list)
-
-    # Проверяем, нужно ли дальнейшее перемешивание
-    current_match = calc_matches(word, current_result)
-
-    # Если сразу получили хороший результат, возвращаем его
-    if current_match <= max_match_percentage:
-        return current_result
-
-    # Ограничение на количество попыток улучшения
-    max_attempts = min(10, len(word) * 2)  # Адаптивное ограничение
-    attempts = 0
-
-    # Защита от одинаковых букв
-    if len(set(word)) == 1:  # Все буквы одинаковые
-        return current_result  # Невозможно перемешать
-
-    # Основной цикл улучшения результата
-    while current_match > max_match_percentage and attempts < max_attempts:
-        # Находим совпадающие позиции
-        matching_positions = []
-        for i in range(len(word)):
-            if word[i] == current_result[i]:
-                matching_positions.append(i)
-
-        # Если нет совпадений, выходим
-        if not matching_positions:
-            break
-
-        # Преобразуем в список для модификации
-        temp_list = list(current_result)
-
-        # Для каждой совпадающей позиции пытаемся найти замену
-        changes_made = False
-        for pos in matching_positions:
-            # Ищем позиции для обмена
-            swap_candidates = []
-            for i in range(len(temp_list)):
-                if i != pos and temp_list[i] != word[i]:
-                    swap_candidates.append(i)
-
-            # Если есть кандидаты, выполняем обмен
-            if swap_candidates:
-                swap_pos = random.choice(swap_candidates)
-                # Выполняем обмен
-                temp_list[pos], temp_list[swap_pos] = (
-                    temp_list[swap_pos],
-                    temp_list[pos],
-                )
-                changes_made = True
-
-        # Если не удалось сделать изменения, выходим
-        if not changes_made:
-            break
-
-        # Обновляем результат
-        new_result = "".join(temp_list)
-        new_match = calc_matches(word, new_result)
-
-        # Сохраняем только если результат улучшился
-        if new_match < current_match:
-            current_result = new_result
-            current_match = new_match
-
-        # Увеличиваем счетчик попыток
-        attempts += 1
-
-        # Дополнительная защита - если делаем много попыток, логируем для отладки
-        if attempts > 5:
-            logger.debug(
-                f"Перемешивание слова '{word}' требует много попыток. "
-                f"Текущий процент совпадений: {current_match:.1f}%, "
-                f"попытка {attempts}/{max_attempts}"
+    scrambled = "".join([word[source] for source in _scramble_sources(word)])
+
+    if logger.isEnabledFor(logging.DEBUG):
+        matches = sum(1 for a, b in zip(word, scrambled) if a == b)
+        match_percentage = matches / len(word) * 100
+        logger.debug(
+            f"Слово '{word}' перемешано в '{scrambled}' "
+            f"с процентом совпадений {match_percentage:.1f}%"
+            + (
+                f" (минимально возможный, предел {max_match_percentage}%)"
+                if match_percentage > max_match_percentage
+                else ""
             )
+        )
 
-    # Финальная проверка и возврат результата
-    logger.debug(
-        f"Слово '{word}' перемешано в '{current_result}' "
-        f"с процентом совпадений {current_match:.1f}% за {attempts} попыток"
+    return scrambled
+
+
+def _scramble_same_length(words: List[str], length: int) -> List[Optional[str]]:
+    """
+    Перемешивает пачку слов одинаковой длины матричными операциями.
+
+    Тот же алгоритм, что в _scramble_sources, но для всех слов сразу. Слова, где
+    одна буква занимает больше половины, возвращаются как None (их немного,
+    они перемешиваются поштучно).
+    """
+    count = len(words)
+    codes = np.frombuffer("".join(words).encode("utf-32-le"), dtype="<u4")
+    codes = codes.reshape(count, length).astype(np.uint64)
+    rng = np.random.default_rng()
+
+    # Случайный порядок групп букв: ключ буквы - биекция кода со случайной солью строки
+    salt = rng.integers(0, 2**63, size=(count, 1), dtype=np.uint64)
+    with np.errstate(over="ignore"):
+        group_key = (codes ^ salt) * np.uint64(0x9E3779B97F4A7C15)
+    tiebreak = rng.random((count, length))
+    positions = np.lexsort((tiebreak, group_key), axis=1)
+
+    # Размер наибольшей группы одинаковых букв в каждой строке
+    grouped = np.take_along_axis(codes, positions, axis=1)
+    columns = np.arange(length)
+    starts = np.ones((count, length), dtype=bool)
+    starts[:, 1:] = grouped[:, 1:] != grouped[:, :-1]
+    run_start = np.maximum.accumulate(np.where(starts, columns, 0), axis=1)
+    largest = (columns - run_start + 1).max(axis=1)
+    valid = 2 * largest <= length
+
+    # Сдвиг по кругу на s из [m, n - m]
+    span = np.where(valid, length - 2 * largest + 1, 1)
+    shift = largest + (rng.random(count) * span).astype(np.int64)
+    sources = np.take_along_axis(positions, (columns + shift[:, None]) % length, axis=1)
+    scrambled = np.empty_like(codes)
+    np.put_along_axis(
+        scrambled, positions, np.take_along_axis(codes, sources, axis=1), axis=1
     )
 
-    return current_result
+    # Проверка гарантии: в допустимых строках нет ни одного совпадения
+    valid &= ~(scrambled == codes).any(axis=1)
+
+    text = scrambled.astype("<u4").tobytes().decode("utf-32-le")
+    return [
+        text[row * length : (row + 1) * length] if ok else None
+        for row, ok in enumerate(valid.tolist())
+    ]
+
+
+def scramble_batch(words: Sequence[str], max_match_percentage: int = 30) -> List[str]:
+    """
+    Перемешивает сразу много слов (раунд игры или весь словарь для прогрева запаса).
+
+    Гарантии те же, что у create_scrambled_word: совпадающих позиций столько,
+    сколько неизбежно при повторах букв. Слова группируются по длине и
+    перемешиваются матричными операциями numpy.
+
+    Args:
+        words: Исходные слова
+        max_match_percentage (int): Максимальный допустимый процент совпадений
+
+    Returns:
+        List[str]: Перемешанные слова в том же порядке
+    """
+    result: List[Optional[str]] = list(words)
+    by_length: Dict[int, List[int]] = {}
+    for index, word in enumerate(words):
+        if word and len(word) > 1:
+            by_length.setdefault(len(word), []).append(index)
+
+    for length, indexes in by_length.items():
+        scrambled = _scramble_same_length([words[index] for index in indexes], length)
+        for index, variant in zip(indexes, scrambled):
+            result[index] = (
+                variant
+                if variant is not None
+                else create_scrambled_word(words[index], max_match_percentage)
+            )
+    return result
+
+
+class ScramblePool:
+    """
+    Запас заранее перемешанных вариантов для каждого слова.
+
+    Запрос забирает готовый вариант из запаса, а пополнение выполняет фоновый
+    поток. Пока поток не запущен (CLI, скрипты) или запас слова пуст, вариант
+    строится на месте. Число слов в запасе ограничено (вытесняются давно
+    не использованные).
+    """
+
+    def __init__(self, per_word: int = 3, max_words: int = 100000):
+        self.per_word = per_word
+        self.max_words = max_words
+
+        self._pools: "OrderedDict[str, Deque[str]]" = OrderedDict()
+        self._pending: Deque[str] = deque()
+        self._pending_set = set()
+
+        self._cond = threading.Condition()
+        self._thread: Optional[threading.Thread] = None
+        self._stopping = False
+
+        # Метрики
+        self._hits = 0
+        self._misses = 0
+        self._generated = 0
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self) -> None:
+        """Запускает фоновый поток пополнения."""
+        if self.running:
+            return
+        self._stopping = False
+        self._thread = threading.Thread(target=self._run, name="scramble-pool", daemon=True)
+        self._thread.start()
+        logger.info("Фоновое пополнение запаса анаграмм запущено")
+
+    def stop(self, timeout: float = 5.0) -> None:
+        """Останавливает фоновый поток (недостроенный запас просто отбрасывается)."""
+        with self._cond:
+            self._stopping = True
+            self._cond.notify_all()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def warm(self, words: Iterable[str]) -> None:
+        """Ставит слова в очередь на заполнение запаса (не больше max_words)."""
+        with self._cond:
+            for word in words:
+                if len(self._pending_set) >= self.max_words:
+                    break
+                self._schedule(word)
+            self._cond.notify()
+
+    def take(self, word: str) -> str:
+        """Возвращает перемешанный вариант слова, по возможности из запаса."""
+        scrambled = None
+        with self._cond:
+            pool = self._pools.get(word)
+            if pool:
+                self._pools.move_to_end(word)
+                scrambled = pool.popleft()
+                self._hits += 1
+            else:
+                self._misses += 1
+            if self.running and (pool is None or len(pool) < self.per_word):
+                self._schedule(word)
+                self._cond.notify()
+
+        if scrambled is None:
+            scrambled = create_scrambled_word(word)
+        return scrambled
+
+    def take_many(self, words: Sequence[str]) -> List[str]:
+        """Возвращает перемешанные варианты слов раунда (недостающие - одной пачкой)."""
+        result: List[Optional[str]] = [None] * len(words)
+        missing: List[int] = []
+        with self._cond:
+            for index, word in enumerate(words):
+                pool = self._pools.get(word)
+                if pool:
+                    self._pools.move_to_end(word)
+                    result[index] = pool.popleft()
+                    self._hits += 1
+                else:
+                    missing.append(index)
+                    self._misses += 1
+                if self.running and (pool is None or len(pool) < self.per_word):
+                    self._schedule(word)
+            if self.running:
+                self._cond.notify()
+
+        if missing:
+            variants = scramble_batch([words[index] for index in missing])
+            for index, variant in zip(missing, variants):
+                result[index] = variant
+        return result
+
+    def _schedule(self, word: str) -> None:
+        # Вызывается под self._cond
+        if word and len(word) > 1 and word not in self._pending_set:
+            self._pending_set.add(word)
+            self._pending.append(word)
+
+    def _run(self) -> None:
+        while True:
+            with self._cond:
+                self._cond.wait_for(lambda: self._stopping or self._pending)
+                if self._stopping:
+                    return
+                words = [
+                    self._pending.popleft() for _ in range(min(len(self._pending), 4096))
+                ]
+                missing = {
+                    word: self.per_word - len(self._pools.get(word, ())) for word in words
+                }
+
+            try:
+                # Перестановки строятся вне блокировки, одной пачкой
+                batch = [word for word, count in missing.items() for _ in range(count)]
+                variants = iter(scramble_batch(batch))
+                generated = {
+                    word: [next(variants) for _ in range(count)]
+                    for word, count in missing.items()
+                    if count > 0
+                }
+            except Exception as e:  # Поток пополнения не должен завершаться из-за ошибки
+                logger.error(f"Ошибка пополнения запаса анаграмм: {e}")
+                generated = {}
+
+            with self._cond:
+                for word in words:
+                    self._pending_set.discard(word)
+                for word, variants in generated.items():
+                    pool = self._pools.get(word)
+                    if pool is None:
+                        pool = self._pools[word] = deque()
+                    pool.extend(variants)
+                    self._generated += len(variants)
+                while len(self._pools) > self.max_words:
+                    self._pools.popitem(last=False)
+
+    def stats(self) -> Dict[str, Any]:
+        """Метрики запаса для мониторинга."""
+        with self._cond:
+            return {
+                "running": self.running,
+                "words": len(self._pools),
+                "pending_words": len(self._pending),
+                "hits_total": self._hits,
+                "misses_total": self._misses,
+                "generated_total": self._generated,
+            }
+
+
+# Запас анаграмм процесса (поток пополнения запускается в lifespan приложения)
+scramble_pool = ScramblePool(
+    per_word=settings.SCRAMBLE_POOL_PER_WORD,
+    max_words=settings.SCRAMBLE_POOL_MAX_WORDS,
+)
@@ -0,0 +1,87 @@
+"""
+Кэш данных авторизованного пользователя.
+
+get_current_user вызывается на каждом запросе, включая каждую проверку ответа
+в игре. Вместо SELECT по users хранится короткоживущий неизменяемый снимок
+полей, которые нужны маршрутам и шаблонам. Снимок сбрасывается при изменении
+пользователя в этом процессе; изменения из других процессов видны не позже TTL.
+"""
+
+import logging
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime
+from typing import NamedTuple, Optional, Tuple
+
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.models import User
+
+logger = logging.getLogger(__name__)
+
+
+class UserIdentity(NamedTuple):
+    """Снимок пользователя только для чтения (без ORM-объекта и сессии)."""
+
+    id: int
+    role: str
+    level: int
+    experience: int
+    name: str
+    email: str
+    total_points: int
+    created_at: Optional[datetime]
+    last_login: Optional[datetime]
+
+
+class UserIdentityCache:
+    """Процессный LRU-кэш снимков пользователей с TTL."""
+
+    def __init__(self, ttl_seconds: float = 30, max_users: int = 10000):
+        self.ttl_seconds = ttl_seconds
+        self.max_users = max_users
+        self._users: "OrderedDict[int, Tuple[UserIdentity, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, db: Session, user_id: int) -> Optional[UserIdentity]:
+        """Возвращает снимок пользователя или None, если пользователя нет."""
+        with self._lock:
+            entry = self._users.get(user_id)
+            if entry is not None and time.monotonic() - entry[1] < self.ttl_seconds:
+                self._users.move_to_end(user_id)
+                return entry[0]
+
+        row = (
+            db.query(*(getattr(User, field) for field in UserIdentity._fields))
+            .filter(User.id == user_id)
+            .first()
+        )
+        if row is None:
+            self.invalidate(user_id)
+            return None
+
+        identity = UserIdentity(*row)
+        with self._lock:
+            self._users[user_id] = (identity, time.monotonic())
+            self._users.move_to_end(user_id)
+            while len(self._users) > self.max_users:
+                self._users.popitem(last=False)
+        return identity
+
+    def invalidate(self, user_id: int) -> None:
+        """Сбрасывает снимок пользователя после изменения его данных."""
+        with self._lock:
+            self._users.pop(user_id, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._users.clear()
+
+
+# Кэш пользователей процесса, используется зависимостями авторизации
+identity_cache = UserIdentityCache(
+    ttl_seconds=settings.USER_CACHE_TTL_SECONDS,
+    max_users=settings.USER_CACHE_MAX_USERS,
+)
@@ -1,6 +1,8 @@
 from fastapi import FastAPI
+from fastapi.responses import ORJSONResponse
 from contextlib import asynccontextmanager
 from starlette.middleware.sessions import SessionMiddleware
+from app.session_tracking import SessionLeakMiddleware
 from fastapi.staticfiles import StaticFiles
 from pathlib import Path
 from fastapi.exceptions import HTTPException
@@ -13,10 +15,16 @@ from app.error_handlers import (
 )
 import logging
 
-from app.routes import auth, index, user, game, admin
+from app.routes import auth, index, user, game, admin, metrics
 from app.config import settings
 from app.templates import templates
 from app.setup_database import setup_database
+from app.database import SessionLocal, async_engine, async_writer_engine, engine, writer_engine
+from app.db_pool import describe_pools
+from app.game_utils import scramble_pool
+from app.password_utils import password_hasher
+from app.word_pool import word_pool
+from app.write_behind import answer_buffer
 
 # Настройка логирования
 level = logging.DEBUG if settings.DEBUG else logging.INFO
@@ -47,9 +55,36 @@ async def lifespan(app: FastAPI):
     else:
         logger.info("Инициализация базы данных отключена через настройки")
 
+    # Загружаем пул слов в память, чтобы первый игровой запрос не строил его
+    scramble_pool.start()
+    try:
+        db = SessionLocal()
+        try:
+            word_pool.load(db)
+            # Анаграммы для всех слов готовятся в фоне
+            scramble_pool.warm(record.text for record in word_pool.records(db))
+        finally:
+            db.close()
+    except Exception as e:
+        logger.error(f"✗ Ошибка при загрузке пула слов: {e}")
+
+    answer_buffer.start()
+    pools = [engine, async_engine.sync_engine]
+    if writer_engine is not None:
+        pools += [writer_engine, async_writer_engine.sync_engine]
+    describe_pools(pools)
+
     yield
     logger.info("Приложение завершает работу...")
 
+    # Записываем ответы, накопленные в буфере отложенной записи
+    answer_buffer.stop()
+    scramble_pool.stop()
+    password_hasher.shutdown()
+    await async_engine.dispose()
+    if async_writer_engine is not None:
+        await async_writer_engine.dispose()
+
 
 # Инициализация FastAPI приложения
 app = FastAPI(
@@ -65,6 +100,7 @@ app.include_router(index.router)  # Основные маршруты (глав
 app.include_router(user.router)  # Маршруты профиля пользователя
 app.include_router(game.router)  # Маршруты игрового процесса
 app.include_router(admin.router)  # Маршруты администратора (добавлено)
+app.include_router(metrics.router)  # Метрики для мониторинга
 
 # Настройка middleware для сессий
 app.add_middleware(
@@ -77,6 +113,9 @@ app.add_middleware(
     ),  # В отладке разрешаем HTTP, в production только HTTPS
 )
 
+# Контроль незакрытых сессий БД (внешний слой: проверка после завершения запроса)
+app.add_middleware(SessionLeakMiddleware)
+
 # Создаем директорию для статических файлов в правильном месте
 BASE_DIR = Path(__file__).resolve().parent
 static_dir = BASE_DIR / "static"
@@ -142,7 +181,7 @@ app.add_exception_handler(Exception, generic_exception_handler)
 
 
 # Корневой маршрут для проверки работы API
-@app.get("/api/health")
+@app.get("/api/health", response_class=ORJSONResponse)
 async def health_check():
     """
     Простой маршрут для проверки работоспособности API.
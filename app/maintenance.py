@@ -0,0 +1,106 @@
+"""
+Служебные команды обслуживания базы данных.
+
+Использование:
+    python -m app.maintenance rebuild-usage [--days N]
+    python -m app.maintenance recompute-word-ratios
+    python -m app.maintenance rebuild-user-word-stats
+    python -m app.maintenance check-user-counters [--repair]
+"""
+
+import argparse
+import logging
+
+from app.database import (
+    SessionLocal,
+    check_user_counters,
+    rebuild_user_word_stats,
+    rebuild_word_usage_daily,
+    recompute_word_ratios,
+)
+
+# Настройка логирования
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+def rebuild_usage(args: argparse.Namespace) -> None:
+    """Пересчитывает дневной агрегат word_usage_daily по истории ответов."""
+    db = SessionLocal()
+    try:
+        rows = rebuild_word_usage_daily(db, days=args.days)
+        logger.info(f"Готово: {rows} строк в word_usage_daily")
+    finally:
+        db.close()
+
+
+def recompute_ratios(args: argparse.Namespace) -> None:
+    """Пересчитывает correct_ratio всех слов по счетчикам."""
+    db = SessionLocal()
+    try:
+        recompute_word_ratios(db)
+    finally:
+        db.close()
+
+
+def rebuild_user_stats(args: argparse.Namespace) -> None:
+    """Заполняет user_word_stats по истории ответов."""
+    db = SessionLocal()
+    try:
+        rows = rebuild_user_word_stats(db)
+        logger.info(f"Готово: {rows} строк в user_word_stats")
+    finally:
+        db.close()
+
+
+def check_counters(args: argparse.Namespace) -> None:
+    """Сверяет итоги игр в строках пользователей с game_sessions."""
+    db = SessionLocal()
+    try:
+        mismatches = check_user_counters(db, repair=args.repair)
+        for row in mismatches:
+            logger.info(
+                f"Пользователь {row['user_id']}: сохранено (игры, ответы) {row['stored']}, "
+                f"фактически {row['actual']}"
+            )
+        action = "исправлено" if args.repair else "найдено"
+        logger.info(f"Готово: расхождений {action} {len(mismatches)}")
+    finally:
+        db.close()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Обслуживание базы данных New Level")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    rebuild = commands.add_parser(
+        "rebuild-usage", help="Пересчитать агрегат word_usage_daily по user_word_history"
+    )
+    rebuild.add_argument(
+        "--days", type=int, default=None, help="Пересчитать только последние N дней"
+    )
+    rebuild.set_defaults(handler=rebuild_usage)
+
+    ratios = commands.add_parser(
+        "recompute-word-ratios", help="Пересчитать correct_ratio слов по times_correct/times_shown"
+    )
+    ratios.set_defaults(handler=recompute_ratios)
+
+    user_stats = commands.add_parser(
+        "rebuild-user-word-stats", help="Пересчитать user_word_stats по user_word_history"
+    )
+    user_stats.set_defaults(handler=rebuild_user_stats)
+
+    counters = commands.add_parser(
+        "check-user-counters",
+        help="Сверить total_games/total_correct пользователей с game_sessions",
+    )
+    counters.add_argument("--repair", action="store_true", help="Исправить расхождения")
+    counters.set_defaults(handler=check_counters)
+
+    args = parser.parse_args()
+    args.handler(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -3,15 +3,17 @@ from sqlalchemy import (
     Integer,
     String,
     ForeignKey,
+    Date,
     DateTime,
     Index,
     Float,
     Boolean,
     UniqueConstraint,
 )
+from sqlalchemy.types import TypeDecorator
 from sqlalchemy.orm import relationship, mapped_column, Mapped, DeclarativeBase
 from typing import Optional, List
-from datetime import datetime
+from datetime import date as date_type, datetime, timezone
 
 
 # Создаем базовый класс для декларативных моделей SQLAlchemy 2.0
@@ -19,6 +21,23 @@ class Base(DeclarativeBase):
     pass
 
 
+class UTCDateTime(TypeDecorator):
+    """
+    Время UTC в столбце без часового пояса (timestamp without time zone).
+
+    Значения с tzinfo приводятся к UTC и передаются драйверу без пояса:
+    asyncpg не принимает aware datetime для такого столбца.
+    """
+
+    impl = DateTime
+    cache_ok = True
+
+    def process_bind_param(self, value, dialect):
+        if isinstance(value, datetime) and value.tzinfo is not None:
+            value = value.astimezone(timezone.utc).replace(tzinfo=None)
+        return value
+
+
 class User(Base):
     __tablename__ = "users"
 
@@ -33,11 +52,17 @@ class User(Base):
     experience: Mapped[int] = mapped_column(Integer, default=0)
     total_points: Mapped[int] = mapped_column(Integer, default=0)
     daily_experience: Mapped[int] = mapped_column(Integer, default=0)
-    daily_experience_updated_at: Mapped[Optional[datetime]] = mapped_column(DateTime, nullable=True)
+    daily_experience_updated_at: Mapped[Optional[datetime]] = mapped_column(
+        UTCDateTime, nullable=True
+    )
+
+    # Денормализованные итоги игр (сверка: python -m app.maintenance check-user-counters)
+    total_games: Mapped[int] = mapped_column(Integer, default=0, server_default="0")
+    total_correct: Mapped[int] = mapped_column(Integer, default=0, server_default="0")
 
     # Метаданные
-    created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
-    last_login: Mapped[Optional[datetime]] = mapped_column(DateTime, nullable=True)
+    created_at: Mapped[datetime] = mapped_column(UTCDateTime, default=datetime.utcnow)
+    last_login: Mapped[Optional[datetime]] = mapped_column(UTCDateTime, nullable=True)
 
     # Отношения
     games_history: Mapped[List["GameSession"]] = relationship(
@@ -46,6 +71,12 @@ class User(Base):
     word_history: Mapped[List["UserWordHistory"]] = relationship(
         "UserWordHistory", back_populates="user", cascade="all, delete-orphan"
     )
+    word_reviews: Mapped[List["WordReview"]] = relationship(
+        "WordReview", cascade="all, delete-orphan"
+    )
+    word_stats: Mapped[List["UserWordStats"]] = relationship(
+        "UserWordStats", cascade="all, delete-orphan"
+    )
 
     # Определяем только один индекс через table_args, а не дублируем его
     __table_args__ = (
@@ -70,16 +101,18 @@ class Word(Base):
     # Статистика использования
     times_shown: Mapped[int] = mapped_column(Integer, default=0)
     times_correct: Mapped[int] = mapped_column(Integer, default=0)
-    correct_ratio: Mapped[float] = mapped_column(Float, default=0.0)  # Для аналитики
+    # times_correct / times_shown, пересчитывается при каждом обновлении счетчиков
+    correct_ratio: Mapped[float] = mapped_column(Float, default=0.0)
 
     # Метаданные
-    created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
-    last_used_at: Mapped[Optional[datetime]] = mapped_column(DateTime, nullable=True)
+    created_at: Mapped[datetime] = mapped_column(UTCDateTime, default=datetime.utcnow)
+    last_used_at: Mapped[Optional[datetime]] = mapped_column(UTCDateTime, nullable=True)
 
     # Индексы для оптимизации запросов
     __table_args__ = (
         Index("ix_words_difficulty", "difficulty"),
         Index("ix_words_times_shown", "times_shown"),
+        Index("ix_words_correct_ratio", "correct_ratio"),
         Index("ix_words_created_at", "created_at"),
     )
 
@@ -90,7 +123,7 @@ class UserWordHistory(Base):
     id: Mapped[int] = mapped_column(Integer, primary_key=True)
     user_id: Mapped[int] = mapped_column(Integer, ForeignKey("users.id"), index=True)
     word_id: Mapped[int] = mapped_column(Integer, ForeignKey("words.id"), index=True)
-    used_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow, index=True)
+    used_at: Mapped[datetime] = mapped_column(UTCDateTime, default=datetime.utcnow, index=True)
     correct: Mapped[bool] = mapped_column(Boolean, default=False)
     game_type: Mapped[str] = mapped_column(String(50))  # Тип игры, в которой использовалось слово
 
@@ -106,6 +139,69 @@ class UserWordHistory(Base):
     )
 
 
+class WordUsageDaily(Base):
+    """Дневной агрегат ответов по слову и типу игры (заполняется инкрементально)."""
+
+    __tablename__ = "word_usage_daily"
+
+    date: Mapped[date_type] = mapped_column(Date, primary_key=True)
+    word_id: Mapped[int] = mapped_column(Integer, ForeignKey("words.id"), primary_key=True)
+    game_type: Mapped[str] = mapped_column(String(50), primary_key=True)
+    shown: Mapped[int] = mapped_column(Integer, default=0)  # Количество ответов
+    correct: Mapped[int] = mapped_column(Integer, default=0)  # Из них правильных
+    users: Mapped[int] = mapped_column(Integer, default=0)  # Различных пользователей за день
+
+    __table_args__ = (
+        # Для графиков динамики по отдельному слову
+        Index("ix_word_usage_daily_word_date", "word_id", "date"),
+    )
+
+
+class UserWordStats(Base):
+    """Итоги ответов пользователя на слово (обновляются вместе с историей)."""
+
+    __tablename__ = "user_word_stats"
+
+    user_id: Mapped[int] = mapped_column(
+        Integer, ForeignKey("users.id", ondelete="CASCADE"), primary_key=True
+    )
+    word_id: Mapped[int] = mapped_column(
+        Integer, ForeignKey("words.id", ondelete="CASCADE"), primary_key=True
+    )
+    seen: Mapped[int] = mapped_column(Integer, default=0)  # Количество ответов
+    correct: Mapped[int] = mapped_column(Integer, default=0)  # Из них правильных
+    last_seen: Mapped[Optional[datetime]] = mapped_column(UTCDateTime, nullable=True)
+    streak: Mapped[int] = mapped_column(Integer, default=0)  # Правильных ответов подряд
+
+    __table_args__ = (
+        # Для статистики по слову (сколько пользователей его видели)
+        Index("ix_user_word_stats_word", "word_id"),
+    )
+
+
+class WordReview(Base):
+    """Состояние интервального повторения слова пользователем (SM-2)."""
+
+    __tablename__ = "word_reviews"
+
+    user_id: Mapped[int] = mapped_column(
+        Integer, ForeignKey("users.id", ondelete="CASCADE"), primary_key=True
+    )
+    word_id: Mapped[int] = mapped_column(
+        Integer, ForeignKey("words.id", ondelete="CASCADE"), primary_key=True
+    )
+    repetitions: Mapped[int] = mapped_column(Integer, default=0)  # Правильных ответов подряд
+    interval_days: Mapped[float] = mapped_column(Float, default=0.0)
+    ease: Mapped[float] = mapped_column(Float, default=2.5)
+    due_at: Mapped[datetime] = mapped_column(UTCDateTime, nullable=False)
+    last_reviewed_at: Mapped[Optional[datetime]] = mapped_column(UTCDateTime, nullable=True)
+
+    __table_args__ = (
+        # Очередь повторения: самые просроченные слова пользователя одним проходом по индексу
+        Index("ix_word_reviews_user_due", "user_id", "due_at"),
+    )
+
+
 class GameSession(Base):
     __tablename__ = "game_sessions"
 
@@ -113,8 +209,8 @@ class GameSession(Base):
     user_id: Mapped[Optional[int]] = mapped_column(Integer, ForeignKey("users.id"))
     game_type: Mapped[str] = mapped_column(String(50), nullable=False)
     score: Mapped[int] = mapped_column(Integer, default=0)
-    started_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
-    completed_at: Mapped[Optional[datetime]] = mapped_column(DateTime, nullable=True)
+    started_at: Mapped[datetime] = mapped_column(UTCDateTime, default=datetime.utcnow)
+    completed_at: Mapped[Optional[datetime]] = mapped_column(UTCDateTime, nullable=True)
 
     # Статистика сессии
     correct_answers: Mapped[int] = mapped_column(Integer, default=0)
@@ -142,5 +238,19 @@ class GameSetting(Base):
     value: Mapped[str] = mapped_column(String(100), nullable=False)
     description: Mapped[Optional[str]] = mapped_column(String(255), nullable=True)
     category: Mapped[str] = mapped_column(String(50), default="system")
+    # Поколение настроек, в котором запись изменена последний раз
+    version: Mapped[int] = mapped_column(Integer, default=0, server_default="0")
+
+    __table_args__ = (
+        Index("ix_game_settings_category", "category"),
+        Index("ix_game_settings_version", "version"),
+    )
+
+
+class SettingsGeneration(Base):
+    """Счетчик поколений игровых настроек (единственная строка с id = 1)."""
 
-    __table_args__ = (Index("ix_game_settings_category", "category"),)
+    __tablename__ = "game_settings_generation"
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    generation: Mapped[int] = mapped_column(Integer, default=0, server_default="0")
@@ -1,8 +1,22 @@
+import asyncio
+import logging
+import multiprocessing
+import threading
+from concurrent.futures import Future, ProcessPoolExecutor
+from typing import Any, Callable, Dict, Optional, TypeVar
+
 from passlib.context import CryptContext
+from starlette.concurrency import run_in_threadpool
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
 
 # Настройка контекста хеширования (алгоритм bcrypt)
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
+T = TypeVar("T")
+
 
 def get_password_hash(password: str) -> str:
     """Возвращает хеш для указанного пароля."""
@@ -12,3 +26,107 @@ def get_password_hash(password: str) -> str:
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     """Сравнивает пароль в открытом виде с его хэшем, возвращает True если совпадают."""
     return pwd_context.verify(plain_password, hashed_password)
+
+
+class PasswordHasherOverloaded(Exception):
+    """Очередь хеширования паролей заполнена - запрос нужно отклонить (503)."""
+
+
+class PasswordHasher:
+    """
+    Пул процессов для bcrypt.
+
+    Хеширование занимает процессор на сотни миллисекунд, поэтому выполняется вне
+    цикла событий и вне общего пула потоков Starlette. Число одновременно
+    ожидающих операций ограничено: сверх лимита сразу выбрасывается
+    PasswordHasherOverloaded, а не копится очередь, тормозящая остальные запросы.
+    При workers = 0 операции выполняются в пуле потоков (без отдельных процессов).
+    """
+
+    def __init__(self, workers: int = 2, max_pending: int = 32):
+        self.workers = workers
+        self.max_pending = max_pending
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._pending = 0
+        self._rejected = 0
+        self._lock = threading.Lock()
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                # spawn: дочерние процессы не наследуют потоки и соединения приложения
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.workers, mp_context=multiprocessing.get_context("spawn")
+                )
+                logger.info(f"Пул хеширования паролей запущен: {self.workers} процессов")
+            return self._executor
+
+    def _release(self, _: Optional[Future] = None) -> None:
+        with self._lock:
+            self._pending -= 1
+
+    async def _run(self, func: Callable[..., T], *args) -> T:
+        with self._lock:
+            if self._pending >= self.max_pending:
+                self._rejected += 1
+                raise PasswordHasherOverloaded(
+                    f"Очередь хеширования паролей заполнена ({self._pending})"
+                )
+            self._pending += 1
+
+        if self.workers <= 0:
+            try:
+                return await run_in_threadpool(func, *args)
+            finally:
+                self._release()
+
+        try:
+            future = self._get_executor().submit(func, *args)
+        except Exception:
+            self._release()
+            raise
+        future.add_done_callback(self._release)
+        return await asyncio.wrap_future(future)
+
+    async def hash(self, password: str) -> str:
+        """Асинхронно возвращает хеш пароля."""
+        return await self._run(get_password_hash, password)
+
+    async def verify(self, plain_password: str, hashed_password: str) -> bool:
+        """Асинхронно сравнивает пароль с хешем."""
+        return await self._run(verify_password, plain_password, hashed_password)
+
+    def shutdown(self) -> None:
+        """Останавливает процессы пула."""
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=True, cancel_futures=True)
+            logger.info("Пул хеширования паролей остановлен")
+
+    def stats(self) -> Dict[str, Any]:
+        """Метрики пула для мониторинга."""
+        with self._lock:
+            return {
+                "workers": self.workers,
+                "pending": self._pending,
+                "max_pending": self.max_pending,
+                "rejected_total": self._rejected,
+            }
+
+
+# Пул хеширования процесса (процессы создаются при первом обращении)
+password_hasher = PasswordHasher(
+    workers=settings.PASSWORD_HASH_WORKERS,
+    max_pending=settings.PASSWORD_HASH_MAX_PENDING,
+)
+
+
+async def get_password_hash_async(password: str) -> str:
+    """Возвращает хеш для указанного пароля, не блокируя цикл событий."""
+    return await password_hasher.hash(password)
+
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    """Сравнивает пароль с хэшем, не блокируя цикл событий."""
+    return await password_hasher.verify(plain_password, hashed_password)
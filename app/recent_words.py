@@ -0,0 +1,166 @@
+"""
+Кэш недавно использованных пользователем слов.
+
+Заменяет запрос DISTINCT по user_word_history за последние 48 часов:
+для каждого пользователя хранится упорядоченное по времени кольцо
+(word_id, used_at) и счетчики слов, которые служат множеством исключений.
+"""
+
+import logging
+import threading
+import time
+from collections import OrderedDict, deque
+from datetime import datetime, timedelta, timezone
+from typing import Deque, Dict, FrozenSet, Optional, Tuple
+
+from sqlalchemy import desc
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.models import UserWordHistory
+
+logger = logging.getLogger(__name__)
+
+
+def _to_timestamp(value: datetime) -> float:
+    """Переводит datetime в UTC timestamp (naive значения из БД считаются UTC)."""
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value.timestamp()
+
+
+class _UserRecent:
+    """Недавние слова одного пользователя."""
+
+    __slots__ = ("ring", "counts", "warmed_at")
+
+    def __init__(self):
+        self.ring: Deque[Tuple[int, float]] = deque()
+        self.counts: Dict[int, int] = {}
+        self.warmed_at = time.monotonic()
+
+    def append(self, word_id: int, used_at: float, max_entries: int) -> None:
+        self.ring.append((word_id, used_at))
+        self.counts[word_id] = self.counts.get(word_id, 0) + 1
+        while len(self.ring) > max_entries:
+            self._pop_oldest()
+
+    def prune(self, cutoff: float) -> None:
+        while self.ring and self.ring[0][1] <= cutoff:
+            self._pop_oldest()
+
+    def _pop_oldest(self) -> None:
+        word_id, _ = self.ring.popleft()
+        left = self.counts[word_id] - 1
+        if left:
+            self.counts[word_id] = left
+        else:
+            del self.counts[word_id]
+
+
+class RecentWordsCache:
+    """
+    Процессный кэш недавних слов пользователей.
+
+    Заполняется при записи ответов и лениво прогревается из БД при промахе.
+    Прогретые записи периодически перечитываются, чтобы учесть ответы,
+    записанные другими процессами.
+    """
+
+    def __init__(
+        self,
+        window_hours: int = 48,
+        max_entries: int = 1000,
+        max_users: int = 10000,
+        resync_seconds: int = 300,
+    ):
+        self.window = timedelta(hours=window_hours)
+        self.max_entries = max_entries
+        self.max_users = max_users
+        self.resync_seconds = resync_seconds
+        self._users: "OrderedDict[int, _UserRecent]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _cutoff(self) -> float:
+        return time.time() - self.window.total_seconds()
+
+    def _warm(self, db: Session, user_id: int) -> _UserRecent:
+        """Загружает недавние слова пользователя из БД (не более max_entries)."""
+        since = datetime.now(timezone.utc) - self.window
+        rows = (
+            db.query(UserWordHistory.word_id, UserWordHistory.used_at)
+            .filter(UserWordHistory.user_id == user_id, UserWordHistory.used_at > since)
+            .order_by(desc(UserWordHistory.used_at))
+            .limit(self.max_entries)
+            .all()
+        )
+
+        entry = _UserRecent()
+        for word_id, used_at in reversed(rows):
+            entry.append(word_id, _to_timestamp(used_at), self.max_entries)
+        logger.debug(f"Недавние слова пользователя {user_id} загружены из БД: {len(rows)}")
+        return entry
+
+    def _entry(self, db: Session, user_id: int) -> _UserRecent:
+        """Недавние слова пользователя (с прогревом из БД при промахе)."""
+        with self._lock:
+            entry = self._users.get(user_id)
+            if entry is not None:
+                self._users.move_to_end(user_id)
+
+        if entry is None or (
+            self.resync_seconds > 0 and time.monotonic() - entry.warmed_at >= self.resync_seconds
+        ):
+            entry = self._warm(db, user_id)
+            with self._lock:
+                self._users[user_id] = entry
+                self._users.move_to_end(user_id)
+                while len(self._users) > self.max_users:
+                    self._users.popitem(last=False)
+
+        with self._lock:
+            entry.prune(self._cutoff())
+        return entry
+
+    def get_excluded(self, db: Session, user_id: int) -> FrozenSet[int]:
+        """Возвращает множество ID слов, использованных пользователем за окно."""
+        entry = self._entry(db, user_id)
+        with self._lock:
+            return frozenset(entry.counts)
+
+    def get_last_used(self, db: Session, user_id: int) -> Dict[int, float]:
+        """Время последнего использования (UTC timestamp) каждого недавнего слова."""
+        entry = self._entry(db, user_id)
+        last_used: Dict[int, float] = {}
+        with self._lock:
+            for word_id, used_at in entry.ring:
+                if used_at > last_used.get(word_id, 0.0):
+                    last_used[word_id] = used_at
+        return last_used
+
+    def record(self, user_id: int, word_id: int, used_at: Optional[datetime] = None) -> None:
+        """
+        Добавляет использованное слово в кэш пользователя.
+
+        Для пользователей, которых нет в кэше, ничего не делает:
+        запись попадет в кэш при прогреве из БД.
+        """
+        timestamp = _to_timestamp(used_at) if used_at else time.time()
+        with self._lock:
+            entry = self._users.get(user_id)
+            if entry is not None:
+                entry.append(word_id, timestamp, self.max_entries)
+
+    def forget(self, user_id: int) -> None:
+        """Удаляет пользователя из кэша."""
+        with self._lock:
+            self._users.pop(user_id, None)
+
+
+# Кэш недавних слов процесса
+recent_words = RecentWordsCache(
+    window_hours=settings.RECENT_WORDS_HOURS,
+    max_entries=settings.RECENT_WORDS_MAX_PER_USER,
+    max_users=settings.RECENT_WORDS_MAX_USERS,
+    resync_seconds=settings.RECENT_WORDS_RESYNC_SECONDS,
+)
@@ -2,6 +2,7 @@ from fastapi import APIRouter, Request, Depends, HTTPException, Form, Query
 from fastapi.responses import RedirectResponse, HTMLResponse
 from sqlalchemy.orm import Session
 from sqlalchemy import func
+from starlette.concurrency import run_in_threadpool
 from datetime import datetime, timezone
 import random
 import logging
@@ -10,6 +11,11 @@ from app.database import get_users_statistics, get_words_statistics
 from app.models import User, Word, GameSetting, GameSession
 from app.auth_utils import get_admin_user, get_db
 from app.templates import templates, render_error_page
+from app.password_utils import PasswordHasherOverloaded, get_password_hash_async
+from app.identity_cache import UserIdentity, identity_cache
+from app.recent_words import recent_words
+from app.settings_cache import game_settings_cache
+from app.word_pool import word_pool
 
 router = APIRouter()
 logger = logging.getLogger(__name__)
@@ -21,7 +27,8 @@ admin_log_format = "🔐 [ADMIN ACTION] %s"
 @router.get("/admin", response_class=HTMLResponse)
 def admin_dashboard(
     request: Request,
-    current_admin: User = Depends(get_admin_user),
+    days: int = Query(30, ge=1, le=365),
+    current_admin: UserIdentity = Depends(get_admin_user),
     db: Session = Depends(get_db),
 ):
     try:
@@ -32,7 +39,7 @@ def admin_dashboard(
 
         # Получаем расширенную статистику
         user_stats = get_users_statistics(db)
-        words_stats = get_words_statistics(db)
+        words_stats = get_words_statistics(db, days)
 
         # Получаем общие настройки игры
         settings = db.query(GameSetting).all()
@@ -59,7 +66,7 @@ def admin_dashboard(
 @router.get("/admin/dictionary", response_class=HTMLResponse)
 def admin_dictionary(
     request: Request,
-    current_admin: User = Depends(get_admin_user),
+    current_admin: UserIdentity = Depends(get_admin_user),
     db: Session = Depends(get_db),
 ):
     try:
@@ -89,7 +96,7 @@ def admin_dictionary(
 
 async def update_settings(
     request: Request,
-    current_admin: User = Depends(get_admin_user),
+    current_admin: UserIdentity = Depends(get_admin_user),
     db: Session = Depends(get_db),
 ):
     try:
@@ -161,7 +168,7 @@ async def update_settings(
 @router.post("/admin/words/create")
 def create_word(
     request: Request,
-    current_admin: User = Depends(get_admin_user),
+    current_admin: UserIdentity = Depends(get_admin_user),
     db: Session = Depends(get_db),
     text: str = Form(...),
     translation: str = Form(...),
@@ -204,6 +211,7 @@ def create_word(
 
             db.add(word)
             db.commit()
+            word_pool.invalidate()
 
             logger.info(
                 admin_log_format, f"Слово '{text}' успешно создано с ID: {word.id}"
@@ -228,7 +236,7 @@ def create_word(
 def delete_word(
     word_id: int,
     request: Request,
-    current_admin: User = Depends(get_admin_user),
+    current_admin: UserIdentity = Depends(get_admin_user),
     db: Session = Depends(get_db),
 ):
     try:
@@ -243,6 +251,7 @@ def delete_word(
 
         db.delete(word)
         db.commit()
+        word_pool.invalidate()
 
         logger.info(admin_log_format, f"Слово с ID: {word_id} успешно удалено")
 
@@ -261,7 +270,7 @@ def delete_word(
 def edit_word_form(
     request: Request,
     word_id: int,
-    current_admin: User = Depends(get_admin_user),
+    current_admin: UserIdentity = Depends(get_admin_user),
     db: Session = Depends(get_db),
 ):
     # Получаем слово из базы данных
@@ -283,7 +292,7 @@ def edit_word_form(
 def update_word(
     word_id: int,
     request: Request,
-    current_admin: User = Depends(get_admin_user),
+    current_admin: UserIdentity = Depends(get_admin_user),
     db: Session = Depends(get_db),
     text: str = Form(...),
     translation: str = Form(...),
@@ -323,6 +332,7 @@ def update_word(
         word.difficulty = difficulty
 
         db.commit()
+        word_pool.invalidate()
 
         logger.info(admin_log_format, f"Слово ID: {word_id} успешно обновлено")
 
@@ -340,7 +350,7 @@ def update_word(
 @router.get("/admin/settings", response_class=HTMLResponse)
 def admin_settings(
     request: Request,
-    current_admin: User = Depends(get_admin_user),
+    current_admin: UserIdentity = Depends(get_admin_user),
     db: Session = Depends(get_db),
 ):
     try:
@@ -372,7 +382,7 @@ def admin_settings(
 @router.post("/admin/settings/update")
 async def update_settings(
     request: Request,
-    current_admin: User = Depends(get_admin_user),
+    current_admin: UserIdentity = Depends(get_admin_user),
     db: Session = Depends(get_db),
 ):
     try:
@@ -383,6 +393,8 @@ async def update_settings(
 
         form_data = await request.form()
         updated_keys = []
+        # Все изменения одной формы получают одно новое поколение настроек
+        version = game_settings_cache.next_generation(db)
 
         # Для отладки выводим все полученные данные формы
         logger.debug(f"Полученные данные формы: {dict(form_data)}")
@@ -411,6 +423,7 @@ async def update_settings(
                             f"Настройка '{setting_key}' изменена с '{setting.value}' на '{value}'",
                         )
                         setting.value = value
+                        setting.version = version
                         updated_keys.append(setting_key)
                 else:
                     # Если настройки нет, создаем ее
@@ -420,11 +433,13 @@ async def update_settings(
                         value=value,
                         description=f"Настройка {setting_key}",
                         category="gameplay",
+                        version=version,
                     )
                     db.add(new_setting)
                     updated_keys.append(setting_key)
 
         db.commit()
+        game_settings_cache.invalidate()
 
         # Финальный лог для общего результата операции
         if updated_keys:
@@ -452,7 +467,7 @@ def admin_users(
     request: Request,
     page: int = Query(1, ge=1),  # FastAPI Query, а не sqlalchemy.orm.Query
     per_page: int = Query(10, ge=5, le=100),
-    current_admin: User = Depends(get_admin_user),
+    current_admin: UserIdentity = Depends(get_admin_user),
     db: Session = Depends(get_db),
 ):
     try:
@@ -495,9 +510,9 @@ def admin_users(
 
 
 @router.post("/admin/users/create")
-def create_user(
+async def create_user(
     request: Request,
-    current_admin: User = Depends(get_admin_user),
+    current_admin: UserIdentity = Depends(get_admin_user),
     db: Session = Depends(get_db),
     name: str = Form(...),
     email: str = Form(...),
@@ -510,7 +525,7 @@ def create_user(
             f"Администратор {current_admin.email} создает нового пользователя с email: {email}, роль: {role}",
         )
 
-        existing = db.query(User).filter(User.email == email).first()
+        existing = await run_in_threadpool(db.query(User).filter(User.email == email).first)
         if existing:
             logger.warning(
                 admin_log_format,
@@ -520,14 +535,16 @@ def create_user(
                 status_code=400, detail="Пользователь с таким email уже существует"
             )
 
-        from app.password_utils import get_password_hash
-
         user = User(
-            name=name, email=email, password_hash=get_password_hash(password), role=role
+            name=name,
+            email=email,
+            password_hash=await get_password_hash_async(password),
+            role=role,
         )
 
         db.add(user)
-        db.commit()
+        await run_in_threadpool(db.commit)
+        await run_in_threadpool(db.refresh, user)
 
         logger.info(
             admin_log_format,
@@ -537,8 +554,15 @@ def create_user(
         return RedirectResponse(url="/admin/users", status_code=303)
     except HTTPException as he:
         raise he
+    except PasswordHasherOverloaded as e:
+        return render_error_page(
+            request=request,
+            error_message="Сервер перегружен, попробуйте создать пользователя через минуту",
+            exception=e,
+            status_code=503,
+        )
     except Exception as e:
-        db.rollback()
+        await run_in_threadpool(db.rollback)
         logger.error(admin_log_format, f"Ошибка при создании пользователя: {e}")
         return render_error_page(
             request=request,
@@ -551,7 +575,7 @@ def create_user(
 def delete_user(
     user_id: int,
     request: Request,
-    current_admin: User = Depends(get_admin_user),
+    current_admin: UserIdentity = Depends(get_admin_user),
     db: Session = Depends(get_db),
 ):
     try:
@@ -576,6 +600,8 @@ def delete_user(
 
         db.delete(user)
         db.commit()
+        recent_words.forget(user_id)
+        identity_cache.invalidate(user_id)
 
         logger.info(admin_log_format, f"Пользователь с ID: {user_id} успешно удален")
 
@@ -596,7 +622,7 @@ def delete_user(
 def toggle_admin_view(
     user_id: int,
     request: Request,
-    current_admin: User = Depends(get_admin_user),
+    current_admin: UserIdentity = Depends(get_admin_user),
     db: Session = Depends(get_db),
 ):
     try:
@@ -639,6 +665,7 @@ def toggle_admin_view(
         user.role = new_role
 
         db.commit()
+        identity_cache.invalidate(user_id)
 
         logger.info(
             admin_log_format,
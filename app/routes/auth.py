@@ -1,9 +1,15 @@
 from fastapi import APIRouter, Request, Depends, Form
 from fastapi.responses import RedirectResponse, HTMLResponse
 from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
 from app.models import User
 from app.auth_utils import get_db
-from app.password_utils import get_password_hash, verify_password
+from app.identity_cache import identity_cache
+from app.password_utils import (
+    PasswordHasherOverloaded,
+    get_password_hash_async,
+    verify_password_async,
+)
 from app.templates import templates, render_error_page
 from datetime import datetime, timezone
 import logging
@@ -26,36 +32,46 @@ def show_login(request: Request):
 
 
 @router.post("/login")
-def process_login(
+async def process_login(
     request: Request,
     db: Session = Depends(get_db),
     email: str = Form(...),
     password: str = Form(...),
 ):
+    # Синхронная сессия: запросы к БД выполняются в пуле потоков, а не в цикле событий
     try:
         # Find user by email
-        user = db.query(User).filter(User.email == email).first()
-        if not user or not verify_password(password, user.password_hash):
+        user = await run_in_threadpool(db.query(User).filter(User.email == email).first)
+        if not user or not await verify_password_async(password, user.password_hash):
             # Invalid login - return login page with error
             return RedirectResponse(
                 url="/login?error=Invalid email or password", status_code=303
             )
 
         # Update last_login when successful
+        user_id, role = user.id, user.role
         user.last_login = datetime.now(timezone.utc)
-        db.commit()
+        await run_in_threadpool(db.commit)
+        identity_cache.invalidate(user_id)
 
         # Save user_id and role in session
-        request.session["user_id"] = user.id
-        request.session["role"] = user.role
+        request.session["user_id"] = user_id
+        request.session["role"] = role
 
         # Redirect to home page after login with success message
         return RedirectResponse(
             url="/?success=You have successfully logged in", status_code=303
         )
+    except PasswordHasherOverloaded as e:
+        return render_error_page(
+            request=request,
+            error_message="Сервер перегружен, попробуйте войти через минуту",
+            exception=e,
+            status_code=503,
+        )
     except Exception as e:
         logger.error(f"Ошибка при обработке входа: {e}")
-        db.rollback()
+        await run_in_threadpool(db.rollback)
         return render_error_page(
             request=request,
             error_message="Ошибка при попытке входа в систему",
@@ -64,7 +80,7 @@ def process_login(
 
 
 @router.post("/register")
-def process_register(
+async def process_register(
     request: Request,
     db: Session = Depends(get_db),
     name: str = Form(...),
@@ -73,7 +89,7 @@ def process_register(
 ):
     try:
         # Check email
-        if db.query(User).filter(User.email == email).first():
+        if await run_in_threadpool(db.query(User).filter(User.email == email).first):
             return RedirectResponse(
                 url="/register?error=Email already registered", status_code=303
             )
@@ -86,11 +102,11 @@ def process_register(
             )
 
         # Create new user
-        hashed_pw = get_password_hash(password)
+        hashed_pw = await get_password_hash_async(password)
         new_user = User(name=name, email=email, password_hash=hashed_pw)
         db.add(new_user)
-        db.commit()
-        db.refresh(new_user)
+        await run_in_threadpool(db.commit)
+        await run_in_threadpool(db.refresh, new_user)
 
         # Auto-login - save to session
         request.session["user_id"] = new_user.id
@@ -100,9 +116,16 @@ def process_register(
         return RedirectResponse(
             url="/?success=Registration successful! Welcome to New Level", status_code=303
         )
+    except PasswordHasherOverloaded as e:
+        return render_error_page(
+            request=request,
+            error_message="Сервер перегружен, попробуйте зарегистрироваться через минуту",
+            exception=e,
+            status_code=503,
+        )
     except Exception as e:
         logger.error(f"Ошибка при регистрации: {e}")
-        db.rollback()
+        await run_in_threadpool(db.rollback)
         return render_error_page(
             request=request,
             error_message="Ошибка при регистрации пользователя",
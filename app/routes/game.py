@@ -1,32 +1,46 @@
 from datetime import datetime, timedelta, timezone
 from fastapi import APIRouter, Query, Request, Depends, HTTPException, status, Body
-from fastapi.responses import HTMLResponse, JSONResponse
-from sqlalchemy import func
+from fastapi.responses import HTMLResponse, JSONResponse, ORJSONResponse
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from typing import Any, Dict, List, Optional
-
-from app.database import get_db, get_random_words
-from app.models import User, UserWordHistory, Word
-from app.auth_utils import get_current_user
+from typing import Any, Collection, Dict, List, Optional, Set, Tuple
+
+from app.database import get_async_db, get_db
+from app.models import GameSession, Word
+from app.auth_utils import get_current_user, get_current_user_async
+from app.identity_cache import UserIdentity
+from app.game_utils import scramble_pool
+from app.recent_words import recent_words
+from app.word_pool import WordRecord, word_pool
+from app.write_behind import AnswerEvent, AnswerQueueFull, answer_buffer
 from app.templates import templates, render_error_page
 import app.database as database
 import app.schemas as schemas
 import logging
+import random
 
 # Настройка логирования
 logger = logging.getLogger(__name__)
 
-router = APIRouter()
+# JSON API отдается через orjson; HTML-страницы явно указывают HTMLResponse
+router = APIRouter(default_response_class=ORJSONResponse)
+
+# Насколько старым может быть время ответа, присланное клиентом в пачке
+MAX_CLIENT_ANSWER_AGE = timedelta(hours=1)
 
 
 @router.get("/game", response_class=HTMLResponse)
-def game_page(request: Request, current_user: User = Depends(get_current_user)):
+def game_page(
+    request: Request,
+    current_user: UserIdentity = Depends(get_current_user),
+    db: Session = Depends(get_db),
+):
     """
     Отображает страницу с игрой.
     Требует аутентификации.
     """
     try:
-        db = next(get_db())
         # Получаем необходимые настройки игры
         settings = database.get_all_game_settings(db)
 
@@ -58,12 +72,12 @@ def game_page(request: Request, current_user: User = Depends(get_current_user)):
         )
 
 
-@router.post("/api/game/start")
-def start_game_session(
+@router.post("/api/game/start", response_model=schemas.GameStartResponse)
+async def start_game_session(
     request: Request,
     data: dict = Body(...),
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    current_user: UserIdentity = Depends(get_current_user_async),
+    db: AsyncSession = Depends(get_async_db),
 ):
     """
     Создает новую игровую сессию и возвращает ее ID.
@@ -76,7 +90,7 @@ def start_game_session(
                 status_code=status.HTTP_400_BAD_REQUEST, detail="Неверный тип игры"
             )
 
-        session = database.create_game_session(db, current_user.id, game_type)
+        session = await database.create_game_session_async(db, current_user.id, game_type)
 
         return {"session_id": session.id, "game_type": game_type}
     except HTTPException as he:
@@ -89,73 +103,118 @@ def start_game_session(
         )
 
 
-@router.get("/api/words/{game_type}")
-def get_game_words(
+def _difficulty_for_level(level: int) -> str:
+    """Сложность слов по уровню пользователя."""
+    if level < 4:
+        return "easy"
+    elif level < 8:
+        return "medium"
+    return "hard"
+
+
+async def _select_round_words(
+    db: AsyncSession,
+    current_user: UserIdentity,
+    game_type: str,
+    count: int,
+    difficulty: Optional[str] = None,
+    also_excluded: Collection[int] = (),
+) -> List[WordRecord]:
+    """
+    Выбирает слова раунда: сначала слова, которые пора повторить, затем
+    новые из пула, исключая недавно использованные пользователем.
+    """
+    also_excluded = frozenset(also_excluded)
+
+    # Очередь повторения не ограничена сложностью по уровню: слова, изученные
+    # на прежнем уровне, тоже нужно повторять
+    due_words: List[WordRecord] = []
+    if await database.get_game_setting_bool_async(db, "spaced_repetition", True):
+        due_words = await db.run_sync(
+            database.get_due_words, current_user.id, count, difficulty, also_excluded
+        )
+        if len(due_words) >= count:
+            return due_words
+
+    # Получаем исключенные слова (использованные пользователем недавно)
+    excluded_ids = await db.run_sync(recent_words.get_excluded, current_user.id)
+    excluded_ids = excluded_ids | also_excluded | {word.id for word in due_words}
+
+    # Определяем сложность на основе уровня пользователя, если не указана
+    if not difficulty:
+        difficulty = _difficulty_for_level(current_user.level)
+
+    # Взвешенный выбор включается для каждого типа игры отдельно
+    weighted = await database.get_game_setting_bool_async(
+        db, f"weighted_selection_{game_type}", False
+    )
+
+    # Получаем случайные слова, исключая недавно использованные
+    new_words = await database.get_random_words_async(
+        db, current_user.id, count - len(due_words), difficulty, excluded_ids, weighted
+    )
+    words = due_words + new_words
+    random.shuffle(words)
+    return words
+
+
+def _round_word_payload(game_type: str, words: List[WordRecord]) -> List[Dict[str, Any]]:
+    """Данные слов раунда для клиента - НЕ отправляем правильные ответы."""
+    # Анаграммы для всего раунда берем из запаса одним обращением
+    scrambled = (
+        scramble_pool.take_many([word.text for word in words])
+        if game_type == "scramble"
+        else []
+    )
+
+    result = []
+    for index, word in enumerate(words):
+        # Базовая информация без правильных ответов
+        word_data = {
+            "id": word.id,
+            "difficulty": word.difficulty,
+        }
+
+        # Информация в зависимости от типа игры
+        if game_type == "scramble":
+            # Для анаграмм даем только перемешанное слово и описание
+            word_data["scrambled"] = scrambled[index]
+            word_data["description"] = word.description
+
+        elif game_type == "matching":
+            # Для сопоставления даем английское слово и описание
+            word_data["text"] = word.text
+            word_data["description"] = word.description
+            word_data["translation"] = word.translation
+
+        elif game_type == "typing":
+            # Для написания даем только описание
+            word_data["description"] = word.description
+
+        result.append(word_data)
+    return result
+
+
+@router.get(
+    "/api/words/{game_type}",
+    response_model=List[schemas.GameWordOut],
+    response_model_exclude_unset=True,
+)
+async def get_game_words(
     game_type: str,
     request: Request,
     count: int = Query(5, gt=0, le=20),
     difficulty: Optional[str] = None,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    current_user: UserIdentity = Depends(get_current_user_async),
+    db: AsyncSession = Depends(get_async_db),
 ):
     try:
         # Проверяем, что тип игры допустимый
         if game_type not in ["scramble", "matching", "typing"]:
             raise HTTPException(status_code=400, detail="Invalid game type")
 
-        # Получаем исключенные слова (использованные пользователем недавно)
-        excluded_ids = (
-            db.query(UserWordHistory.word_id)
-            .filter(
-                UserWordHistory.user_id == current_user.id,
-                UserWordHistory.used_at
-                > datetime.now(timezone.utc) - timedelta(hours=48),
-            )
-            .distinct()
-            .all()
-        )
-        excluded_ids = [x[0] for x in excluded_ids]
-
-        # Определяем сложность на основе уровня пользователя, если не указана
-        if not difficulty:
-            if current_user.level < 4:
-                difficulty = "easy"
-            elif current_user.level < 8:
-                difficulty = "medium"
-            else:
-                difficulty = "hard"
-
-        # Получаем случайные слова, исключая недавно использованные
-        words = get_random_words(db, current_user.id, count, difficulty, excluded_ids)
-
-        # Подготавливаем результат - НЕ отправляем правильные ответы
-        result = []
-        for word in words:
-            # Базовая информация без правильных ответов
-            word_data = {
-                "id": word.id,
-                "difficulty": word.difficulty,
-            }
-
-            # Информация в зависимости от типа игры
-            if game_type == "scramble":
-                # Для анаграмм даем только перемешанное слово и описание
-                from app.game_utils import create_scrambled_word
-
-                word_data["scrambled"] = create_scrambled_word(word.text)
-                word_data["description"] = word.description
-
-            elif game_type == "matching":
-                # Для сопоставления даем английское слово и описание
-                word_data["text"] = word.text
-                word_data["description"] = word.description
-                word_data["translation"] = word.translation
-
-            elif game_type == "typing":
-                # Для написания даем только описание
-                word_data["description"] = word.description
-
-            result.append(word_data)
+        words = await _select_round_words(db, current_user, game_type, count, difficulty)
+        result = _round_word_payload(game_type, words)
 
         return result
     except HTTPException as he:
@@ -169,61 +228,125 @@ def get_game_words(
         )
 
 
-@router.post("/api/word/check")
-def check_word_answer(
+async def _build_round(
+    db: AsyncSession,
+    current_user: UserIdentity,
+    data: schemas.RoundRequest,
+    also_excluded: Collection[int] = (),
+) -> Dict[str, Any]:
+    """Слова раунда и, для "Сопоставления", лишние варианты перевода."""
+    words = await _select_round_words(
+        db, current_user, data.game_type, data.count, data.difficulty, also_excluded
+    )
+    round_data: Dict[str, Any] = {"words": _round_word_payload(data.game_type, words)}
+    if data.game_type == "matching":
+        round_data["distractors"] = await db.run_sync(
+            database.get_distractor_translations, words, data.distractors
+        )
+    return round_data
+
+
+@router.post(
+    "/api/game/round",
+    response_model=schemas.RoundBundle,
+    response_model_exclude_unset=True,
+)
+async def get_game_round(
+    request: Request,
+    data: schemas.RoundRequest,
+    current_user: UserIdentity = Depends(get_current_user_async),
+    db: AsyncSession = Depends(get_async_db),
+):
+    """
+    Все данные для начала раунда одним запросом: игровая сессия (новая или
+    переданная), слова, анаграммы и варианты перевода. При prefetch=true
+    в ответ добавляется следующий раунд, чтобы клиент не ждал его загрузки.
+    """
+    try:
+        session = None
+        if data.session_id is not None:
+            session = await db.get(GameSession, data.session_id)
+            if not session or session.user_id != current_user.id:
+                raise HTTPException(
+                    status_code=status.HTTP_404_NOT_FOUND,
+                    detail="Игровая сессия не найдена",
+                )
+        else:
+            session = await database.create_game_session_async(
+                db, current_user.id, data.game_type
+            )
+
+        bundle = await _build_round(db, current_user, data, data.exclude)
+        bundle["session_id"] = session.id
+        bundle["game_type"] = data.game_type
+
+        if data.prefetch:
+            # Следующий раунд не повторяет слова текущего
+            current_ids = [word["id"] for word in bundle["words"]] + data.exclude
+            bundle["next"] = await _build_round(db, current_user, data, current_ids)
+
+        return bundle
+    except HTTPException as he:
+        raise he
+    except Exception as e:
+        logger.error(f"Ошибка при подготовке раунда: {e}")
+        return JSONResponse(
+            status_code=500, content={"detail": "Ошибка при подготовке раунда"}
+        )
+
+
+def _is_answer_correct(word: Any, game_type: str, answer: str) -> bool:
+    """Проверка ответа зависит от типа игры - ВСЯ ВАЛИДАЦИЯ НА СЕРВЕРЕ."""
+    # Нормализуем строки для сравнения: удаляем пробелы, приводим к нижнему регистру
+    answer_clean = answer.lower().strip()
+
+    if game_type in ("scramble", "typing"):
+        # Для анаграмм и набора текста проверяем соответствие английскому слову
+        return answer_clean == word.text.lower().strip()
+    if game_type == "matching":
+        # Для сопоставления проверяем соответствие переводу
+        return answer_clean == word.translation.lower().strip()
+    return False
+
+
+@router.post("/api/word/check", response_model=schemas.WordCheckResponse)
+async def check_word_answer(
     request: Request,
     word_id: int = Body(...),
     answer: str = Body(...),
     game_type: str = Body(...),
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    current_user: UserIdentity = Depends(get_current_user_async),
+    db: AsyncSession = Depends(get_async_db),
 ):
     """
     Проверяет ответ пользователя на слово.
     """
     try:
-        word = db.query(Word).filter(Word.id == word_id).first()
+        word = await db.run_sync(word_pool.get, word_id)
         if not word:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND, detail="Слово не найдено"
             )
 
-        # Нормализуем строки для сравнения: удаляем пробелы, приводим к нижнему регистру
-        answer_clean = answer.lower().strip()
-
-        # Проверка ответа зависит от типа игры - ВСЯ ВАЛИДАЦИЯ НА СЕРВЕРЕ
-        correct = False
+        correct = _is_answer_correct(word, game_type, answer)
 
-        if game_type == "scramble":
-            # Для анаграмм проверяем соответствие английскому слову
-            word_text_clean = word.text.lower().strip()
-            correct = answer_clean == word_text_clean
-        elif game_type == "matching":
-            # Для сопоставления проверяем соответствие переводу
-            translation_clean = word.translation.lower().strip()
-            correct = answer_clean == translation_clean
-        elif game_type == "typing":
-            # Для набора текста проверяем соответствие английскому слову
-            word_text_clean = word.text.lower().strip()
-            correct = answer_clean == word_text_clean
-
-        # Обновляем статистику слова
-        database.update_word_stats(db, word_id, correct)
-
-        # Добавляем запись в историю использования слов пользователем
-        word_history = UserWordHistory(
-            user_id=current_user.id,
-            word_id=word_id,
-            used_at=datetime.now(timezone.utc),
-            correct=correct,
-            game_type=game_type,
+        # История, статистика слова и дневной агрегат записываются отложенно
+        used_at = datetime.now(timezone.utc)
+        await answer_buffer.add_answer_async(
+            AnswerEvent(current_user.id, word_id, game_type, correct, used_at)
         )
-        db.add(word_history)
-        db.commit()
+        recent_words.record(current_user.id, word_id, used_at)
 
         return {"correct": correct}
     except HTTPException as he:
         raise he
+    except AnswerQueueFull as e:
+        return render_error_page(
+            request=request,
+            error_message="Сервер перегружен, повторите ответ через несколько секунд",
+            exception=e,
+            status_code=503,
+        )
     except Exception as e:
         logger.error(f"Ошибка при проверке ответа: {e}")
         return render_error_page(
@@ -232,18 +355,19 @@ def check_word_answer(
 
 
 # game.py
-@router.post("/api/game/end")
-def end_game_session(
+@router.post("/api/game/end", response_model=schemas.GameEndResponse)
+async def end_game_session(
     request: Request,
     session_id: int = Body(...),
     score: int = Body(...),
     correct_answers: int = Body(...),
     total_questions: int = Body(...),
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    hints_used: int = Body(0, ge=0),
+    current_user: UserIdentity = Depends(get_current_user_async),
+    db: AsyncSession = Depends(get_async_db),
 ):
     try:
-        session = database.complete_game_session(
+        session = await database.complete_game_session_async(
             db, session_id, score, correct_answers, total_questions
         )
         if not session:
@@ -252,29 +376,29 @@ def end_game_session(
                 detail="Игровая сессия не найдена",
             )
 
-        points_per_answer = database.get_game_setting_int(db, "points_per_answer", 10)
-        exp_points = correct_answers * points_per_answer
-        exp_points -= hintPenalty if hintUsed else 0
+        points_per_answer = await database.get_game_setting_int_async(
+            db, "points_per_answer", 10
+        )
+        hint_penalty = await database.get_game_setting_int_async(db, "hint_penalty", 3)
+        # Штраф за подсказки не делает начисление отрицательным
+        exp_points = max(0, correct_answers * points_per_answer - hints_used * hint_penalty)
 
-        user, level_up, daily_limit_reached = database.add_user_experience(
+        award, level_up, daily_limit_reached = await database.add_user_experience_async(
             db, current_user.id, exp_points
         )
 
-        daily_exp_limit = database.get_game_setting_int(
+        daily_exp_limit = await database.get_game_setting_int_async(
             db, "daily_experience_limit", 200
         )
-        daily_exp_current = (
-            user.daily_experience if hasattr(user, "daily_experience") else 0
-        )
 
         result = {
-            "experience_gained": 0 if daily_limit_reached else exp_points,
-            "total_experience": user.experience,
-            "level": user.level,
+            "experience_gained": award.gained,
+            "total_experience": award.experience,
+            "level": award.level,
             "level_up": level_up,
             "daily_limit_reached": daily_limit_reached,
             "daily_exp_limit": daily_exp_limit,
-            "daily_exp_current": daily_exp_current,
+            "daily_exp_current": award.daily_experience,
         }
         return result
     except HTTPException as he:
@@ -288,26 +412,28 @@ def end_game_session(
         )
 
 
-@router.get("/api/translation-options")
-def get_translation_options(
+@router.get("/api/translation-options", response_model=List[schemas.TranslationOption])
+async def get_translation_options(
     request: Request,
     count: int = Query(3, gt=0, le=10),
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    difficulty: Optional[str] = Query(None, pattern="^(easy|medium|hard)$"),
+    exclude: List[int] = Query([], max_length=50),
+    current_user: UserIdentity = Depends(get_current_user_async),
+    db: AsyncSession = Depends(get_async_db),
 ):
     """
     Возвращает варианты перевода для игры "Сопоставление".
+
+    Переводы выбираются из пула слов без повторов; переводы слов exclude
+    (правильные ответы текущего раунда) в варианты не попадают.
     """
     try:
-        # Получаем случайные слова
-        words = db.query(Word).order_by(func.random()).limit(count).all()
+        translations = await db.run_sync(
+            word_pool.sample_translations, count, difficulty, frozenset(exclude)
+        )
 
         # Формируем варианты ответов (только переводы)
-        options = []
-        for word in words:
-            options.append({"text": word.translation})
-
-        return options
+        return [{"text": translation} for translation in translations]
     except Exception as e:
         logger.error(f"Ошибка при получении вариантов перевода: {e}")
         return JSONResponse(
@@ -316,57 +442,157 @@ def get_translation_options(
         )
 
 
-@router.post("/api/matching/check")
-def check_matching_answers(
-    request: Request,
-    answers: List[Dict[str, Any]] = Body(...),
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
+def _answer_time(answered_at: Optional[datetime], now: datetime) -> datetime:
+    """
+    Время ответа по часам клиента (UTC). Время из будущего или старше
+    MAX_CLIENT_ANSWER_AGE заменяется временем сервера.
+    """
+    if answered_at is None:
+        return now
+    if answered_at.tzinfo is None:
+        answered_at = answered_at.replace(tzinfo=timezone.utc)
+    answered_at = answered_at.astimezone(timezone.utc)
+    if answered_at > now or now - answered_at > MAX_CLIENT_ANSWER_AGE:
+        return now
+    return answered_at
+
+
+def _unique_answer_time(
+    used: Set[Tuple[int, datetime]], word_id: int, used_at: datetime
+) -> datetime:
+    """
+    Время ответа, не повторяющееся в пачке: история уникальна по (пользователь,
+    слово, время), поэтому повторный ответ на слово сдвигается на 1 мкс.
+    """
+    while (word_id, used_at) in used:
+        used_at += timedelta(microseconds=1)
+    used.add((word_id, used_at))
+    return used_at
+
+
+@router.post("/api/answers/batch", response_model=schemas.AnswerBatchResponse)
+async def check_answer_batch(
+    data: schemas.AnswerBatchRequest,
+    current_user: UserIdentity = Depends(get_current_user_async),
+    db: AsyncSession = Depends(get_async_db),
 ):
     """
-    Проверяет ответы для игры "Сопоставление".
+    Проверяет все ответы раунда одним запросом.
+
+    Слова читаются одним запросом IN, история и счетчики слов записываются
+    одной транзакцией (пакетная вставка и одна инструкция приращений).
+    Если хотя бы одно слово не найдено, ничего не записывается.
     """
-    try:
-        results = []
-        all_correct = True
-
-        for answer in answers:
-            word_id = answer.get("wordId")
-            user_answer = answer.get("answer")
-
-            if not word_id or not user_answer:
-                continue
-
-            # Получаем слово
-            word = db.query(Word).filter(Word.id == word_id).first()
-            if not word:
-                continue
-
-            # Проверяем ответ
-            correct = word.translation.lower().strip() == user_answer.lower().strip()
-
-            # Если хотя бы один ответ неверный, all_correct будет False
-            if not correct:
-                all_correct = False
-
-            # Обновляем статистику слова
-            database.update_word_stats(db, word_id, correct)
-
-            # Добавляем запись в историю использования слов пользователем
-            word_history = UserWordHistory(
-                user_id=current_user.id,
-                word_id=word_id,
-                used_at=datetime.now(timezone.utc),
-                correct=correct,
-                game_type="matching",
+    word_ids = {answer.word_id for answer in data.answers}
+    rows = await db.execute(
+        select(Word.id, Word.text, Word.translation).where(Word.id.in_(word_ids))
+    )
+    words = {row.id: row for row in rows}
+    if len(words) != len(word_ids):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail="Слово не найдено"
+        )
+
+    now = datetime.now(timezone.utc)
+    events = []
+    used: Set[Tuple[int, datetime]] = set()
+    for answer in data.answers:
+        used_at = _unique_answer_time(
+            used, answer.word_id, _answer_time(answer.answered_at, now)
+        )
+        events.append(
+            AnswerEvent(
+                current_user.id,
+                answer.word_id,
+                answer.game_type,
+                _is_answer_correct(words[answer.word_id], answer.game_type, answer.answer),
+                used_at,
             )
-            db.add(word_history)
+        )
 
-            # Добавляем результат (без правильных ответов)
-            results.append({"word_id": word_id, "correct": correct})
+    try:
+        await db.run_sync(database.apply_answer_batch, events, {}, {})
+    except Exception as e:
+        logger.error(f"Ошибка при записи пачки ответов ({len(events)}): {e}")
+        return JSONResponse(
+            status_code=500, content={"detail": "Ошибка при проверке ответов"}
+        )
 
-        db.commit()
+    for event in events:
+        recent_words.record(current_user.id, event.word_id, event.used_at)
 
+    results = [{"word_id": event.word_id, "correct": event.correct} for event in events]
+    return {
+        "correct_count": sum(1 for event in events if event.correct),
+        "total": len(events),
+        "results": results,
+    }
+
+
+def _check_matching_answers(
+    db: Session, user_id: int, answers: List[Dict[str, Any]]
+) -> Tuple[bool, List[Dict[str, Any]]]:
+    """
+    Проверяет ответы "Сопоставления" и записывает историю (синхронная часть).
+
+    Все слова читаются одним запросом IN, история и счетчики слов записываются
+    одной транзакцией через apply_answer_batch - число запросов не зависит
+    от количества пар.
+    """
+    submitted = [
+        (answer.get("wordId"), answer.get("answer"))
+        for answer in answers
+        if answer.get("wordId") and answer.get("answer")
+    ]
+    if not submitted:
+        return True, []
+
+    # Получаем все слова раунда одним запросом
+    word_ids = {word_id for word_id, _ in submitted}
+    words = {
+        row.id: row
+        for row in db.execute(
+            select(Word.id, Word.text, Word.translation).where(Word.id.in_(word_ids))
+        )
+    }
+
+    now = datetime.now(timezone.utc)
+    used: Set[Tuple[int, datetime]] = set()
+    events = [
+        AnswerEvent(
+            user_id,
+            word_id,
+            "matching",
+            _is_answer_correct(words[word_id], "matching", user_answer),
+            _unique_answer_time(used, word_id, now),
+        )
+        for word_id, user_answer in submitted
+        if word_id in words
+    ]
+    if events:
+        database.apply_answer_batch(db, events, {}, {})
+        for event in events:
+            recent_words.record(user_id, event.word_id, event.used_at)
+
+    # Результаты без правильных ответов
+    results = [{"word_id": event.word_id, "correct": event.correct} for event in events]
+    return all(event.correct for event in events), results
+
+
+@router.post("/api/matching/check", response_model=schemas.MatchingCheckResponse)
+async def check_matching_answers(
+    request: Request,
+    answers: List[Dict[str, Any]] = Body(...),
+    current_user: UserIdentity = Depends(get_current_user_async),
+    db: AsyncSession = Depends(get_async_db),
+):
+    """
+    Проверяет ответы для игры "Сопоставление".
+    """
+    try:
+        all_correct, results = await db.run_sync(
+            _check_matching_answers, current_user.id, answers
+        )
         return {"all_correct": all_correct, "results": results}
     except Exception as e:
         logger.error(f"Ошибка при проверке сопоставлений: {e}")
@@ -376,9 +602,9 @@ def check_matching_answers(
 
 
 @router.get("/api/debug/word-count")
-def get_word_count(request: Request, db: Session = Depends(get_db)):
+async def get_word_count(request: Request, db: AsyncSession = Depends(get_async_db)):
     try:
-        count = db.query(func.count(Word.id)).scalar()
+        count = await database.count_words_async(db)
         return {"count": count}
     except Exception as e:
         logger.error(f"Ошибка при подсчете количества слов: {e}")
@@ -6,6 +6,7 @@ from typing import Optional
 from app.database import get_db
 from app.models import User
 from app.auth_utils import get_optional_user
+from app.identity_cache import UserIdentity
 from app.templates import templates, render_error_page
 import app.database as crud
 import logging
@@ -74,7 +75,7 @@ def index_page(request: Request, db: Session = Depends(get_db)):
 
 
 @router.get("/about", response_class=HTMLResponse)
-def about_page(request: Request, user: Optional[User] = Depends(get_optional_user)):
+def about_page(request: Request, user: Optional[UserIdentity] = Depends(get_optional_user)):
     """
     Страница о проекте
     """
@@ -94,7 +95,7 @@ def about_page(request: Request, user: Optional[User] = Depends(get_optional_use
 
 
 @router.get("/training", response_class=HTMLResponse)
-def training_page(request: Request, user: Optional[User] = Depends(get_optional_user)):
+def training_page(request: Request, user: Optional[UserIdentity] = Depends(get_optional_user)):
     """
     Страница о методике обучения
     """
@@ -0,0 +1,43 @@
+from fastapi import APIRouter, Depends
+from fastapi.responses import ORJSONResponse
+import logging
+
+from app.auth_utils import get_admin_user
+from app.identity_cache import UserIdentity
+from app.database import async_engine, async_writer_engine, engine, writer_engine
+from app.db_pool import pool_stats
+from app.game_utils import scramble_pool
+from app.password_utils import password_hasher
+import app.session_tracking as session_tracking
+from app.word_weights import word_sampler
+from app.write_behind import answer_buffer
+
+# Настройка логирования
+logger = logging.getLogger(__name__)
+
+router = APIRouter(default_response_class=ORJSONResponse)
+
+
+@router.get("/api/metrics")
+def get_metrics(current_admin: UserIdentity = Depends(get_admin_user)):
+    """
+    Метрики внутренних очередей и кэшей приложения.
+    Доступно только администраторам.
+    """
+    database_pools = {
+        "sync": pool_stats(engine),
+        "async": pool_stats(async_engine.sync_engine),
+    }
+    # Движки писателя есть только в профиле SQLite
+    if writer_engine is not None:
+        database_pools["sync_writer"] = pool_stats(writer_engine)
+        database_pools["async_writer"] = pool_stats(async_writer_engine.sync_engine)
+
+    return {
+        "write_buffer": answer_buffer.stats(),
+        "scramble_pool": scramble_pool.stats(),
+        "password_hasher": password_hasher.stats(),
+        "word_weights": word_sampler.stats(),
+        "database_pools": database_pools,
+        "leaked_db_sessions_total": session_tracking.leaked_sessions_total,
+    }
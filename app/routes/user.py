@@ -1,8 +1,10 @@
 from fastapi import APIRouter, Request, Depends, Form, HTTPException
 from fastapi.responses import RedirectResponse, HTMLResponse
 from sqlalchemy.orm import Session
-from app.auth_utils import get_current_user, get_db
-from app.password_utils import get_password_hash, verify_password
+from starlette.concurrency import run_in_threadpool
+from app.auth_utils import get_current_user, get_current_user_fresh, get_db
+from app.identity_cache import UserIdentity, identity_cache
+from app.password_utils import PasswordHasherOverloaded, get_password_hash_async
 from app.models import User
 from app.templates import templates, render_error_page
 import app.database as database
@@ -15,7 +17,7 @@ router = APIRouter()
 
 
 @router.get("/", response_class=HTMLResponse)
-def index_page(request: Request):
+def index_page(request: Request, db: Session = Depends(get_db)):
     """
     Публичная домашняя страница, доступная без аутентификации.
     """
@@ -25,7 +27,6 @@ def index_page(request: Request):
         # Если пользователь авторизован - показываем его профиль
         if user_id:
             try:
-                db = next(get_db())
                 user = db.query(User).filter(User.id == user_id).first()
                 if user:
                     return templates.TemplateResponse(
@@ -55,7 +56,7 @@ def index_page(request: Request):
 @router.get("/profile", response_class=HTMLResponse)
 def show_profile(
     request: Request,
-    current_user: User = Depends(get_current_user),
+    current_user: UserIdentity = Depends(get_current_user),
     db: Session = Depends(get_db),
 ):
     """
@@ -65,6 +66,8 @@ def show_profile(
     try:
         # Получаем статистику пользователя
         stats = database.get_user_stats(db, current_user.id)
+        if stats is not None:
+            stats.update(database.get_user_word_summary(db, current_user.id))
 
         # Рассчитываем прогресс до следующего уровня
         exp_for_level_up = database.get_game_setting_int(db, "points_for_level_up", 100)
@@ -91,9 +94,9 @@ def show_profile(
 
 
 @router.post("/profile")
-def update_profile(
+async def update_profile(
     request: Request,
-    current_user: User = Depends(get_current_user),
+    current_user: User = Depends(get_current_user_fresh),
     db: Session = Depends(get_db),
     name: str = Form(...),
     email: str = Form(...),
@@ -102,7 +105,7 @@ def update_profile(
     try:
         # If email changed, check if new email is already taken
         if email != current_user.email:
-            existing = db.query(User).filter(User.email == email).first()
+            existing = await run_in_threadpool(db.query(User).filter(User.email == email).first)
             if existing:
                 return RedirectResponse(
                     url="/profile?error=This email is already used by another account",
@@ -118,7 +121,7 @@ def update_profile(
                     status_code=303,
                 )
             else:
-                new_password_hash = get_password_hash(password)
+                new_password_hash = await get_password_hash_async(password)
 
         # Update user data
         current_user.name = name
@@ -127,15 +130,24 @@ def update_profile(
         if new_password_hash:
             current_user.password_hash = new_password_hash
 
-        db.commit()
+        user_id = current_user.id
+        await run_in_threadpool(db.commit)
+        identity_cache.invalidate(user_id)
 
         # Redirect back to profile with success message
         return RedirectResponse(
             url="/profile?success=Profile updated successfully", status_code=303
         )
+    except PasswordHasherOverloaded as e:
+        return render_error_page(
+            request=request,
+            error_message="Сервер перегружен, попробуйте сохранить профиль через минуту",
+            exception=e,
+            status_code=503,
+        )
     except Exception as e:
         logger.error(f"Error updating profile: {e}")
-        db.rollback()
+        await run_in_threadpool(db.rollback)
         return render_error_page(
             request=request,
             error_message="Ошибка при обновлении профиля пользователя",
@@ -134,6 +134,120 @@ class GameSessionRead(GameSessionBase):
         model_config = {"from_attributes": True}
 
 
+# === Ответы игрового API ===
+
+
+class GameStartResponse(BaseModel):
+    """Созданная игровая сессия."""
+
+    session_id: int
+    game_type: str
+
+
+class GameWordOut(BaseModel):
+    """Слово раунда без правильного ответа (набор полей зависит от типа игры)."""
+
+    id: int
+    difficulty: str
+    scrambled: Optional[str] = None
+    text: Optional[str] = None
+    description: Optional[str] = None
+    translation: Optional[str] = None
+
+
+class RoundRequest(BaseModel):
+    """
+    Запрос раунда: тип игры, размер и необязательная предзагрузка следующего.
+
+    exclude - ID слов, которые клиент уже показывает (текущий раунд): они не
+    попадут в новый раунд.
+    """
+
+    game_type: str = Field(..., pattern="^(scramble|matching|typing)$")
+    count: int = Field(5, gt=0, le=20)
+    difficulty: Optional[str] = Field(None, pattern="^(easy|medium|hard)$")
+    session_id: Optional[int] = None
+    distractors: int = Field(2, ge=0, le=10)
+    prefetch: bool = False
+    exclude: List[int] = Field(default_factory=list, max_length=50)
+
+
+class RoundWords(BaseModel):
+    """Слова раунда и лишние варианты перевода (для "Сопоставления")."""
+
+    words: List[GameWordOut]
+    distractors: List[str] = []
+
+
+class RoundBundle(RoundWords):
+    """Все данные для начала раунда одним ответом."""
+
+    session_id: int
+    game_type: str
+    next: Optional[RoundWords] = None
+
+
+class WordCheckResponse(BaseModel):
+    """Результат проверки одного ответа."""
+
+    correct: bool
+
+
+class GameEndResponse(BaseModel):
+    """Итоги завершенной игры и начисленный опыт."""
+
+    experience_gained: int
+    total_experience: int
+    level: int
+    level_up: bool
+    daily_limit_reached: bool
+    daily_exp_limit: int
+    daily_exp_current: int
+
+
+class TranslationOption(BaseModel):
+    """Вариант перевода для игры "Сопоставление"."""
+
+    text: str
+
+
+class MatchingResult(BaseModel):
+    """Результат проверки одного сопоставления."""
+
+    word_id: int
+    correct: bool
+
+
+class MatchingCheckResponse(BaseModel):
+    """Результаты проверки всех сопоставлений."""
+
+    all_correct: bool
+    results: List[MatchingResult]
+
+
+class AnswerIn(BaseModel):
+    """Ответ на слово в пачке; answered_at - время ответа по часам клиента."""
+
+    word_id: int
+    answer: str = Field(..., max_length=200)
+    game_type: str = Field(..., pattern="^(scramble|matching|typing)$")
+    answered_at: Optional[datetime] = None
+
+
+class AnswerBatchRequest(BaseModel):
+    """Все ответы раунда."""
+
+    answers: List[AnswerIn] = Field(..., min_length=1, max_length=50)
+
+
+class AnswerBatchResponse(BaseModel):
+    """Результаты проверки пачки ответов в порядке запроса."""
+
+    correct_count: int
+    total: int
+    results: List[MatchingResult]
+
+
 # === Авторизация ===
 
 
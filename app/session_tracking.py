@@ -0,0 +1,77 @@
+"""
+Контроль жизненного цикла сессий БД в рамках запроса.
+
+Пока сессия держит транзакцию (а значит, соединение из пула), она числится
+открытой в контекстной переменной запроса. Middleware в конце запроса
+проверяет, что открытых сессий не осталось; незакрытые (например, созданные
+через next(get_db()) и брошенные) попадают в лог и закрываются принудительно,
+чтобы соединение вернулось в пул, а не ждало сборщика мусора.
+"""
+
+import logging
+from contextvars import ContextVar
+from typing import Dict, Optional
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session, SessionTransaction
+from sqlalchemy.util import greenlet_spawn
+
+logger = logging.getLogger(__name__)
+
+# Сессии текущего запроса с открытой транзакцией: id(сессии) -> сессия
+_open_sessions: ContextVar[Optional[Dict[int, Session]]] = ContextVar(
+    "open_db_sessions", default=None
+)
+
+# Сколько незакрытых сессий обнаружено с запуска процесса
+leaked_sessions_total = 0
+
+
+@event.listens_for(Session, "after_begin")
+def _track_session(session: Session, transaction: SessionTransaction, connection) -> None:
+    sessions = _open_sessions.get()
+    if sessions is not None:
+        sessions[id(session)] = session
+
+
+@event.listens_for(Session, "after_transaction_end")
+def _untrack_session(session: Session, transaction: SessionTransaction) -> None:
+    sessions = _open_sessions.get()
+    if sessions is not None and transaction.parent is None:
+        sessions.pop(id(session), None)
+
+
+class SessionLeakMiddleware:
+    """ASGI middleware: закрывает и логирует сессии, не закрытые к концу запроса."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        sessions: Dict[int, Session] = {}
+        token = _open_sessions.set(sessions)
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            _open_sessions.reset(token)
+            if sessions:
+                await self._close_leaked(scope, list(sessions.values()))
+
+    @staticmethod
+    async def _close_leaked(scope, sessions) -> None:
+        global leaked_sessions_total
+        leaked_sessions_total += len(sessions)
+        logger.warning(
+            f"Незакрытые сессии БД в конце запроса {scope.get('method')} {scope.get('path')}: "
+            f"{len(sessions)}"
+        )
+        for session in sessions:
+            try:
+                # greenlet_spawn нужен сессиям асинхронного движка, синхронным не мешает
+                await greenlet_spawn(session.close)
+            except Exception as e:
+                logger.error(f"Ошибка при закрытии незакрытой сессии БД: {e}")
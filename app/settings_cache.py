@@ -0,0 +1,134 @@
+"""
+Кэш игровых настроек (таблица game_settings).
+
+Таблица читается целиком один раз и дальше отдается из памяти.
+Каждое изменение настроек увеличивает счетчик поколений (одна строка в
+game_settings_generation) в той же транзакции; по нему другие процессы
+дешево (чтением одной строки) обнаруживают изменения.
+"""
+
+import logging
+import threading
+import time
+from typing import Dict, Optional
+
+from sqlalchemy import func, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.models import GameSetting, SettingsGeneration
+
+logger = logging.getLogger(__name__)
+
+
+class GameSettingsCache:
+    """Типизированный кэш игровых настроек с проверкой поколения."""
+
+    def __init__(self, check_seconds: float = 5):
+        self.check_seconds = check_seconds
+        self._values: Optional[Dict[str, str]] = None
+        self._generation = 0
+        self._checked_at = 0.0
+        # Номер сброса кэша: загрузка, начатая до сброса, не сохраняет результат
+        self._epoch = 0
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def current_generation(db: Session) -> int:
+        """Текущее поколение настроек в БД."""
+        return (
+            db.query(SettingsGeneration.generation)
+            .filter(SettingsGeneration.id == 1)
+            .scalar()
+            or 0
+        )
+
+    @staticmethod
+    def next_generation(db: Session) -> int:
+        """
+        Выдает новое поколение настроек в транзакции вызывающего.
+
+        Счетчик увеличивается одним UPDATE ... RETURNING: строка остается
+        заблокированной до фиксации, поэтому параллельные изменения настроек
+        (в том числе из разных процессов) не получают одно поколение.
+        """
+        bump = (
+            update(SettingsGeneration)
+            .where(SettingsGeneration.id == 1)
+            .values(generation=SettingsGeneration.generation + 1)
+            .returning(SettingsGeneration.generation)
+            .execution_options(synchronize_session=False)
+        )
+        generation = db.execute(bump).scalar()
+        if generation is not None:
+            return generation
+
+        # Счетчика еще нет: продолжаем версии, уже записанные в game_settings
+        generation = (db.query(func.max(GameSetting.version)).scalar() or 0) + 1
+        try:
+            with db.begin_nested():
+                db.add(SettingsGeneration(id=1, generation=generation))
+        except IntegrityError:
+            # Счетчик создан параллельной транзакцией - увеличиваем его
+            generation = db.execute(bump).scalar()
+        return generation
+
+    def invalidate(self) -> None:
+        """Сбрасывает кэш; настройки будут перечитаны при следующем обращении."""
+        with self._lock:
+            self._epoch += 1
+            self._values = None
+
+    def _load(self, db: Session) -> Dict[str, str]:
+        epoch = self._epoch
+        # Поколение читается до настроек: изменение между чтениями даст
+        # устаревшее поколение и повторную загрузку, а не пропущенное изменение
+        generation = self.current_generation(db)
+        values = dict(db.query(GameSetting.key, GameSetting.value).all())
+        with self._lock:
+            # Кэш сброшен во время чтения - прочитанное могло устареть, не сохраняем
+            if self._epoch == epoch:
+                self._values = values
+                self._generation = generation
+                self._checked_at = time.monotonic()
+        logger.debug(f"Игровые настройки загружены: {len(values)}, поколение {generation}")
+        return values
+
+    def _get_values(self, db: Session) -> Dict[str, str]:
+        values = self._values
+        if values is not None and time.monotonic() - self._checked_at < self.check_seconds:
+            return values
+
+        # БД читается без блокировки: в run_sync чтение приостанавливает сопрограмму
+        # в потоке цикла событий, и следующий запрос ждал бы блокировку, не отпуская цикл
+        if values is None:
+            return self._load(db)
+        # Настройки могли измениться в другом процессе
+        if self.current_generation(db) != self._generation:
+            return self._load(db)
+        self._checked_at = time.monotonic()
+        return values
+
+    def get(self, db: Session, key: str, default: str = "") -> str:
+        return self._get_values(db).get(key, default)
+
+    def get_int(self, db: Session, key: str, default: int = 0) -> int:
+        value = self._get_values(db).get(key)
+        try:
+            return int(value) if value is not None else default
+        except (ValueError, TypeError):
+            return default
+
+    def get_bool(self, db: Session, key: str, default: bool = False) -> bool:
+        value = self._get_values(db).get(key)
+        if value is None:
+            return default
+        return value.strip().lower() in ("1", "true", "yes", "on")
+
+    def get_all(self, db: Session) -> Dict[str, str]:
+        return dict(self._get_values(db))
+
+
+# Кэш настроек процесса
+game_settings_cache = GameSettingsCache(check_seconds=settings.GAME_SETTINGS_CHECK_SECONDS)
@@ -1,5 +1,24 @@
-from app.database import SessionLocal, engine
-from app.models import Base, User, Word, GameSession, GameSetting
+from typing import List
+
+from sqlalchemy import inspect, text
+
+from app.database import (
+    SessionLocal,
+    check_user_counters,
+    engine,
+    rebuild_user_word_stats,
+    rebuild_word_usage_daily,
+)
+from app.models import (
+    Base,
+    User,
+    Word,
+    GameSession,
+    GameSetting,
+    UserWordHistory,
+    UserWordStats,
+    WordUsageDaily,
+)
 from app.password_utils import get_password_hash
 import random
 from datetime import datetime, timezone
@@ -26,11 +45,49 @@ def create_scrambled_word(word):
     return scrambled
 
 
+def upgrade_schema() -> List[str]:
+    """
+    Добавляет в существующие таблицы недостающие столбцы и индексы.
+
+    create_all создает только отсутствующие таблицы, поэтому новые столбцы
+    моделей добавляются здесь через ALTER TABLE (со значением server_default).
+
+    Returns:
+        Добавленные столбцы в виде "таблица.столбец"
+    """
+    added = []
+    inspector = inspect(engine)
+    with engine.begin() as conn:
+        for table in Base.metadata.sorted_tables:
+            if not inspector.has_table(table.name):
+                continue
+
+            existing_columns = {column["name"] for column in inspector.get_columns(table.name)}
+            for column in table.columns:
+                if column.name in existing_columns:
+                    continue
+                column_type = column.type.compile(dialect=engine.dialect)
+                ddl = f"ALTER TABLE {table.name} ADD COLUMN {column.name} {column_type}"
+                if column.server_default is not None:
+                    ddl += f" DEFAULT {column.server_default.arg}"
+                conn.execute(text(ddl))
+                added.append(f"{table.name}.{column.name}")
+                logger.info(f"Добавлен столбец {table.name}.{column.name}")
+
+            existing_indexes = {index["name"] for index in inspector.get_indexes(table.name)}
+            for index in table.indexes:
+                if index.name not in existing_indexes:
+                    index.create(conn)
+                    logger.info(f"Создан индекс {index.name}")
+    return added
+
+
 def setup_database():
     """Настройка базы данных - создание таблиц и начальных данных."""
     try:
         # Создаем таблицы
         Base.metadata.create_all(bind=engine)
+        added_columns = upgrade_schema()
         logger.info("Таблицы успешно созданы.")
 
         # Создаем начальные данные
@@ -100,6 +157,26 @@ def setup_database():
             if words_added > 0:
                 logger.info(f"Добавлено {words_added} начальных слов в словарь")
 
+            # Первичное заполнение агрегата для баз, где история уже накоплена
+            if (
+                not db.query(WordUsageDaily).first()
+                and db.query(UserWordHistory.id).first()
+            ):
+                logger.info("Агрегат word_usage_daily пуст, заполняем по истории ответов")
+                rebuild_word_usage_daily(db)
+
+            if (
+                not db.query(UserWordStats.user_id).first()
+                and db.query(UserWordHistory.id).first()
+            ):
+                logger.info("Таблица user_word_stats пуста, заполняем по истории ответов")
+                rebuild_user_word_stats(db)
+
+            # Счетчики игр, только что добавленные в users, заполняем по сессиям
+            if "users.total_games" in added_columns:
+                logger.info("Заполняем итоги игр пользователей по game_sessions")
+                check_user_counters(db, repair=True)
+
             db.close()
             return True
         except Exception as inner_error:
@@ -0,0 +1,57 @@
+"""
+Расписание интервального повторения слов (упрощенный SM-2).
+
+Правильный ответ увеличивает интервал до следующего повторения: 1 день,
+6 дней, затем интервал умножается на коэффициент легкости слова. Ошибка
+сбрасывает серию, уменьшает легкость и возвращает слово через несколько
+минут. Чтение и запись состояний - в app.database (таблица word_reviews).
+"""
+
+from datetime import datetime, timedelta
+from typing import NamedTuple, Tuple
+
+# Начальный и минимальный коэффициент легкости (как в SM-2)
+INITIAL_EASE = 2.5
+MIN_EASE = 1.3
+EASE_STEP_CORRECT = 0.1
+EASE_STEP_WRONG = 0.2
+
+# Интервалы первых двух правильных ответов подряд, дни
+FIRST_INTERVAL_DAYS = 1.0
+SECOND_INTERVAL_DAYS = 6.0
+# Через сколько вернуть слово после ошибки
+RELEARN_INTERVAL_DAYS = 10 / (24 * 60)
+MAX_INTERVAL_DAYS = 365.0
+
+
+class ReviewState(NamedTuple):
+    """Состояние повторения слова пользователем."""
+
+    repetitions: int
+    interval_days: float
+    ease: float
+
+
+INITIAL_STATE = ReviewState(repetitions=0, interval_days=0.0, ease=INITIAL_EASE)
+
+
+def next_review(
+    state: ReviewState, correct: bool, reviewed_at: datetime
+) -> Tuple[ReviewState, datetime]:
+    """Новое состояние после ответа и время следующего повторения."""
+    if correct:
+        repetitions = state.repetitions + 1
+        if repetitions == 1:
+            interval = FIRST_INTERVAL_DAYS
+        elif repetitions == 2:
+            interval = SECOND_INTERVAL_DAYS
+        else:
+            interval = min(state.interval_days * state.ease, MAX_INTERVAL_DAYS)
+        ease = state.ease + EASE_STEP_CORRECT
+    else:
+        repetitions = 0
+        interval = RELEARN_INTERVAL_DAYS
+        ease = max(MIN_EASE, state.ease - EASE_STEP_WRONG)
+
+    new_state = ReviewState(repetitions, interval, ease)
+    return new_state, reviewed_at + timedelta(days=interval)
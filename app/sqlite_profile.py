@@ -0,0 +1,97 @@
+"""
+Производственный профиль SQLite (включается SQLITE_PERFORMANCE_PROFILE=true).
+
+- На каждом новом соединении выставляются PRAGMA: журнал WAL (читатели не
+  блокируют писателя), synchronous=NORMAL, mmap_size, cache_size и busy_timeout.
+- Все записи идут через отдельный движок с единственным соединением: писатели
+  ждут своей очереди в пуле, а не получают "database is locked". Чтение идет
+  через обычный пул.
+- Синхронный и асинхронный писатели - разные соединения, поэтому транзакции
+  писателей начинаются с BEGIN IMMEDIATE: блокировка записи захватывается
+  сразу, и второй писатель ждет ее в пределах busy_timeout, а не получает
+  отказ при повышении блокировки чтения до записи.
+"""
+
+import logging
+from typing import Any, Dict, Type
+
+from sqlalchemy import Delete, Insert, Update, event
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.db_pool import InstrumentedAsyncQueuePool, InstrumentedQueuePool
+
+logger = logging.getLogger(__name__)
+
+
+def apply_sqlite_pragmas(engine: Engine) -> None:
+    """Выставляет PRAGMA профиля на каждом новом соединении движка."""
+
+    @event.listens_for(engine, "connect")
+    def _set_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        try:
+            cursor.execute("PRAGMA journal_mode=WAL")
+            cursor.execute("PRAGMA synchronous=NORMAL")
+            cursor.execute(f"PRAGMA mmap_size={int(settings.SQLITE_MMAP_SIZE)}")
+            cursor.execute(f"PRAGMA cache_size={int(settings.SQLITE_CACHE_SIZE)}")
+            cursor.execute(f"PRAGMA busy_timeout={int(settings.SQLITE_BUSY_TIMEOUT_MS)}")
+        finally:
+            cursor.close()
+
+    logger.info(f"Профиль SQLite включен для пула {engine.pool.logging_name or engine.url}")
+
+
+def use_immediate_transactions(engine: Engine) -> None:
+    """Транзакции соединений движка начинаются с BEGIN IMMEDIATE."""
+
+    @event.listens_for(engine, "connect")
+    def _disable_driver_transactions(dbapi_connection, connection_record):
+        # Драйвер sqlite3 сам открывает транзакции (BEGIN DEFERRED) - отключаем
+        dbapi_connection.isolation_level = None
+
+    @event.listens_for(engine, "begin")
+    def _begin_immediate(connection):
+        connection.exec_driver_sql("BEGIN IMMEDIATE")
+
+
+def make_routing_session_class(reader: Engine, writer: Engine) -> Type[Session]:
+    """
+    Класс сессии, отправляющий записи в движок писателя.
+
+    После первой записи (flush или INSERT/UPDATE/DELETE) все запросы транзакции
+    идут через писателя, чтобы видеть собственные незафиксированные изменения.
+    """
+
+    class RoutingSession(Session):
+        _use_writer = False
+
+        def get_bind(self, mapper=None, clause=None, **kw):
+            if self._use_writer or self._flushing or isinstance(clause, (Insert, Update, Delete)):
+                self._use_writer = True
+                return writer
+            return reader
+
+    @event.listens_for(RoutingSession, "after_transaction_end")
+    def _release_writer(session: Session, transaction) -> None:
+        if transaction.parent is None:
+            session._use_writer = False
+
+    return RoutingSession
+
+
+def is_sqlite_file(url) -> bool:
+    """True для SQLite с файлом базы (не в памяти)."""
+    return url.get_backend_name() == "sqlite" and url.database not in (None, "", ":memory:")
+
+
+def writer_pool_options(name: str, is_async: bool = False) -> Dict[str, Any]:
+    """Параметры пула писателя: одно соединение, остальные писатели ждут в очереди."""
+    return {
+        "poolclass": InstrumentedAsyncQueuePool if is_async else InstrumentedQueuePool,
+        "pool_size": 1,
+        "max_overflow": 0,
+        "pool_timeout": settings.DB_POOL_TIMEOUT,
+        "pool_logging_name": name,
+    }
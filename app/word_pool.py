@@ -0,0 +1,305 @@
+"""
+Процессный пул слов для быстрого выбора слов в играх.
+
+Хранит компактные массивы ID слов по уровням сложности и облегченные записи
+слов, чтобы выбор слов для раунда не требовал обращения к базе данных.
+"""
+
+import logging
+import random
+import threading
+import time
+from array import array
+from typing import Collection, Dict, List, NamedTuple, Optional
+
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.models import Word
+
+logger = logging.getLogger(__name__)
+
+
+class WordRecord(NamedTuple):
+    """Облегченная запись слова (без ORM-объекта и статистики)."""
+
+    id: int
+    text: str
+    translation: str
+    description: str
+    difficulty: str
+
+
+class _Translations(NamedTuple):
+    """Различные переводы (без учета регистра и пробелов по краям)."""
+
+    keys: List[str]
+    # Нормализованный перевод -> перевод в написании первого слова
+    by_key: Dict[str, str]
+
+
+class _PoolSnapshot(NamedTuple):
+    """Неизменяемый снимок пула: подменяется целиком при перестроении."""
+
+    records: Dict[int, WordRecord]
+    ids_by_difficulty: Dict[str, array]
+    all_ids: array
+    translations_by_difficulty: Dict[str, _Translations]
+    all_translations: _Translations
+    loaded_at: float
+
+
+def _translation_key(translation: str) -> str:
+    return translation.lower().strip()
+
+
+def _translations(by_key: Dict[str, str]) -> _Translations:
+    return _Translations(list(by_key), by_key)
+
+
+class WordPool:
+    """
+    Индекс слов в памяти процесса.
+
+    Снимок строится целиком и подменяется одной операцией присваивания,
+    поэтому чтение не требует блокировок. Слова читаются из БД без блокировки:
+    в run_sync чтение приостанавливает сопрограмму в потоке цикла событий, и
+    ожидание блокировки другим запросом остановило бы весь цикл. Под блокировкой
+    только подменяется снимок.
+    """
+
+    def __init__(self, refresh_seconds: int = 300):
+        self.refresh_seconds = refresh_seconds
+        self._snapshot: Optional[_PoolSnapshot] = None
+        # Номер сброса пула: загрузка, начатая до сброса, не сохраняет снимок
+        self._epoch = 0
+        # Пул сброшен: снимок еще отдается, но будет перестроен первым же запросом
+        self._stale = False
+        self._lock = threading.Lock()
+        # Захватывается без ожидания: занят - пул уже обновляется
+        self._refreshing = threading.Lock()
+
+    @property
+    def loaded(self) -> bool:
+        return self._snapshot is not None
+
+    def load(self, db: Session) -> int:
+        """
+        Загружает все слова из базы в память.
+
+        Returns:
+            int: Количество загруженных слов
+        """
+        return len(self._load(db).records)
+
+    def _load(self, db: Session) -> _PoolSnapshot:
+        epoch = self._epoch
+        rows = db.query(
+            Word.id, Word.text, Word.translation, Word.description, Word.difficulty
+        ).all()
+
+        records: Dict[int, WordRecord] = {}
+        ids_by_difficulty: Dict[str, array] = {}
+        all_ids = array("q")
+        translations_by_difficulty: Dict[str, Dict[str, str]] = {}
+        all_translations: Dict[str, str] = {}
+        for row in rows:
+            record = WordRecord(*row)
+            records[record.id] = record
+            ids_by_difficulty.setdefault(record.difficulty, array("q")).append(record.id)
+            all_ids.append(record.id)
+            key = _translation_key(record.translation)
+            translations_by_difficulty.setdefault(record.difficulty, {}).setdefault(
+                key, record.translation
+            )
+            all_translations.setdefault(key, record.translation)
+
+        snapshot = _PoolSnapshot(
+            records,
+            ids_by_difficulty,
+            all_ids,
+            {
+                difficulty: _translations(by_key)
+                for difficulty, by_key in translations_by_difficulty.items()
+            },
+            _translations(all_translations),
+            time.monotonic(),
+        )
+        with self._lock:
+            # Пул сброшен во время чтения (слово изменено) - снимок мог устареть
+            if self._epoch == epoch:
+                self._snapshot = snapshot
+                self._stale = False
+        logger.info(f"Пул слов загружен: {len(records)} слов")
+        return snapshot
+
+    def invalidate(self) -> None:
+        """
+        Помечает пул устаревшим; он будет перестроен при следующем обращении.
+
+        Снимок не удаляется: перестраивает его один запрос, остальные до конца
+        загрузки получают прежний снимок, а не читают словарь параллельно.
+        """
+        with self._lock:
+            self._epoch += 1
+            self._stale = True
+        logger.debug("Пул слов помечен как устаревший")
+
+    def _get_snapshot(self, db: Session) -> _PoolSnapshot:
+        snapshot = self._snapshot
+        if (
+            snapshot is not None
+            and not self._stale
+            and (
+                self.refresh_seconds <= 0
+                or time.monotonic() - snapshot.loaded_at < self.refresh_seconds
+            )
+        ):
+            return snapshot
+
+        if snapshot is None:
+            return self._load(db)
+        # Устаревший пул обновляет один запрос, остальные пока получают прежний снимок
+        if not self._refreshing.acquire(blocking=False):
+            return snapshot
+        try:
+            return self._load(db)
+        finally:
+            self._refreshing.release()
+
+    def records(self, db: Session) -> List[WordRecord]:
+        """Возвращает все записи слов пула."""
+        return list(self._get_snapshot(db).records.values())
+
+    def ids(self, db: Session, difficulty: Optional[str] = None) -> array:
+        """
+        Массив ID слов сложности (или всех слов). Массив не меняется, пока
+        не перестроен пул, поэтому по нему можно определять смену снимка.
+        """
+        snapshot = self._get_snapshot(db)
+        if difficulty:
+            return snapshot.ids_by_difficulty.get(difficulty, array("q"))
+        return snapshot.all_ids
+
+    def get(self, db: Session, word_id: int) -> Optional[WordRecord]:
+        """Возвращает запись слова по ID или None."""
+        return self._get_snapshot(db).records.get(word_id)
+
+    def sample(
+        self,
+        db: Session,
+        count: int,
+        difficulty: Optional[str] = None,
+        excluded_ids: Optional[Collection[int]] = None,
+    ) -> List[WordRecord]:
+        """
+        Выбирает до count случайных слов без повторов.
+
+        Исключения применяются только если после них останется не меньше count слов,
+        иначе выбор идет из всех слов данной сложности.
+        Стоимость зависит от count и размера excluded_ids, но не от размера словаря.
+        """
+        snapshot = self._get_snapshot(db)
+        ids = snapshot.ids_by_difficulty.get(difficulty) if difficulty else snapshot.all_ids
+        if not ids:
+            return []
+
+        excluded: Collection[int] = excluded_ids or ()
+        available = len(ids)
+        if excluded:
+            # Считаем, сколько исключенных слов действительно попадает в выборку
+            records = snapshot.records
+            excluded_here = sum(
+                1
+                for word_id in excluded
+                if word_id in records
+                and (not difficulty or records[word_id].difficulty == difficulty)
+            )
+            if available - excluded_here >= count:
+                available -= excluded_here
+            else:
+                excluded = ()
+
+        # Если доступно слишком мало слов - берем все что есть
+        if available <= count:
+            selected = [word_id for word_id in ids if word_id not in excluded]
+        else:
+            selected = self._sample_ids(ids, count, excluded)
+
+        return [snapshot.records[word_id] for word_id in selected]
+
+    def sample_translations(
+        self,
+        db: Session,
+        count: int,
+        difficulty: Optional[str] = None,
+        excluded_ids: Optional[Collection[int]] = None,
+    ) -> List[str]:
+        """
+        Выбирает до count различных переводов для лишних вариантов ответа.
+
+        Переводы слов из excluded_ids (правильные ответы раунда) и совпадающие
+        с ними без учета регистра не выбираются. Выбор идет из различных
+        переводов, собранных при построении снимка, поэтому стоимость зависит
+        от count, но не от размера словаря.
+        """
+        snapshot = self._get_snapshot(db)
+        translations = (
+            snapshot.translations_by_difficulty.get(difficulty)
+            if difficulty
+            else snapshot.all_translations
+        )
+        if not translations or count <= 0:
+            return []
+
+        records = snapshot.records
+        taken = {
+            _translation_key(records[word_id].translation)
+            for word_id in excluded_ids or ()
+            if word_id in records
+        }
+        keys = translations.keys
+        available = len(keys) - sum(1 for key in taken if key in translations.by_key)
+
+        if available <= count * 2:
+            # Различных переводов немного - выбираем из оставшихся целиком
+            rest = [key for key in keys if key not in taken]
+            chosen = random.sample(rest, min(count, len(rest)))
+        else:
+            # Подходит больше половины переводов - отбраковка завершается быстро
+            chosen = []
+            size = len(keys)
+            while len(chosen) < count:
+                key = keys[random.randrange(size)]
+                if key not in taken:
+                    taken.add(key)
+                    chosen.append(key)
+
+        return [translations.by_key[key] for key in chosen]
+
+    @staticmethod
+    def _sample_ids(ids: array, count: int, excluded: Collection[int]) -> List[int]:
+        """Выбор случайных индексов с отбраковкой исключенных и повторных ID."""
+        size = len(ids)
+        chosen: List[int] = []
+        seen = set()
+        attempts = 0
+        max_attempts = count * 8 + 32
+
+        while len(chosen) < count and attempts < max_attempts:
+            word_id = ids[random.randrange(size)]
+            attempts += 1
+            if word_id not in seen and word_id not in excluded:
+                seen.add(word_id)
+                chosen.append(word_id)
+
+        if len(chosen) < count:
+            # Исключено почти все - доберем линейным проходом
+            rest = [word_id for word_id in ids if word_id not in seen and word_id not in excluded]
+            chosen.extend(random.sample(rest, min(count - len(chosen), len(rest))))
+
+        return chosen
+
+
+# Пул слов процесса, используется игровыми маршрутами
+word_pool = WordPool(refresh_seconds=settings.WORD_POOL_REFRESH_SECONDS)
@@ -0,0 +1,304 @@
+"""
+Взвешенный выбор слов для раундов.
+
+Вес слова растет, если на него часто отвечают неверно (times_correct /
+times_shown, то есть correct_ratio), и если его мало показывали. Для каждой
+сложности строится таблица псевдонимов (метод Vose), поэтому выбор одного
+слова стоит O(1) независимо от размера словаря. Точность самого пользователя
+учитывается при выборе из кандидатов: выученные им слова выпадают реже.
+
+Счетчики слов обновляются в памяти по мере записи ответов этим процессом;
+таблица сложности перестраивается в фоновом потоке, когда накопленные
+изменения превышают порог или обновлен пул слов, а выбор до конца
+перестроения идет по прежней таблице. Изменения из других процессов видны
+после обновления пула слов.
+"""
+
+import logging
+import random
+import threading
+from array import array
+from typing import Collection, Dict, List, Optional, Sequence
+
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.models import UserWordStats, Word
+from app.word_pool import WordRecord, word_pool
+
+logger = logging.getLogger(__name__)
+
+# Минимальный вес: даже выученное всеми слово иногда попадается
+MIN_WEIGHT = 0.25
+# Добавка к весу редко показанных слов (убывает с числом показов)
+NOVELTY_WEIGHT = 1.0
+# Во сколько раз кандидатов больше, чем нужно слов (для учета точности пользователя)
+CANDIDATE_FACTOR = 3
+# Множитель веса слова, на которое пользователь всегда отвечает правильно
+USER_MASTERED_FACTOR = 0.2
+
+
+def word_weight(times_shown: int, times_correct: int) -> float:
+    """Вес слова по общим счетчикам ответов."""
+    # Сглаженная доля правильных ответов: у нового слова 0.5, а не 0 или 1
+    ratio = (times_correct + 1) / (times_shown + 2)
+    return MIN_WEIGHT + (1.0 - ratio) + NOVELTY_WEIGHT / (1 + times_shown)
+
+
+class AliasTable:
+    """Таблица псевдонимов Vose: выбор элемента с заданными весами за O(1)."""
+
+    __slots__ = ("ids", "prob", "alias")
+
+    def __init__(self, ids: Sequence[int], weights: Sequence[float]):
+        size = len(ids)
+        total = sum(weights)
+        self.ids = ids
+        self.prob = array("d", [1.0]) * size
+        self.alias = array("q", range(size))
+        if size == 0 or total <= 0:
+            return
+
+        scaled = [weight * size / total for weight in weights]
+        small = [index for index, value in enumerate(scaled) if value < 1.0]
+        large = [index for index, value in enumerate(scaled) if value >= 1.0]
+        while small and large:
+            less, more = small.pop(), large.pop()
+            self.prob[less] = scaled[less]
+            self.alias[less] = more
+            scaled[more] = scaled[more] + scaled[less] - 1.0
+            (small if scaled[more] < 1.0 else large).append(more)
+        # Оставшиеся ячейки (в том числе из-за погрешности округления) заполнены целиком
+        for index in small + large:
+            self.prob[index] = 1.0
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def draw(self) -> int:
+        index = random.randrange(len(self.ids))
+        if random.random() < self.prob[index]:
+            return self.ids[index]
+        return self.ids[self.alias[index]]
+
+
+class _Table:
+    """Таблица сложности и снимок пула, по которому она построена."""
+
+    __slots__ = ("source_ids", "alias")
+
+    def __init__(self, source_ids: array, alias: AliasTable):
+        self.source_ids = source_ids
+        self.alias = alias
+
+
+class WordWeightSampler:
+    """Процессный взвешенный выбор слов по таблицам псевдонимов."""
+
+    def __init__(self, rebuild_drift: float = 0.1):
+        self.rebuild_drift = rebuild_drift
+        # word_id -> [times_shown, times_correct]
+        self._counters: Dict[int, List[int]] = {}
+        self._difficulty: Dict[int, str] = {}
+        self._counters_source: Optional[array] = None
+        self._tables: Dict[Optional[str], _Table] = {}
+        # Изменения счетчиков по сложности с момента построения таблицы
+        self._changes: Dict[Optional[str], int] = {}
+        self._lock = threading.Lock()
+        # Захватывается без ожидания: занят - таблицы уже перестраиваются в фоне
+        self._rebuilding = threading.Lock()
+        self._rebuilds = 0
+
+    def observe(self, shown: Dict[int, int], correct: Dict[int, int]) -> None:
+        """Учитывает записанные приращения счетчиков слов."""
+        with self._lock:
+            if self._counters_source is None:
+                return
+            for word_id in set(shown) | set(correct):
+                counters = self._counters.get(word_id)
+                if counters is None:
+                    continue
+                delta_shown, delta_correct = shown.get(word_id, 0), correct.get(word_id, 0)
+                counters[0] += delta_shown
+                counters[1] += delta_correct
+                change = delta_shown + delta_correct
+                difficulty = self._difficulty[word_id]
+                self._changes[difficulty] = self._changes.get(difficulty, 0) + change
+                self._changes[None] = self._changes.get(None, 0) + change
+
+    def invalidate(self) -> None:
+        with self._lock:
+            self._counters_source = None
+            self._tables.clear()
+
+    @staticmethod
+    def _read_counters(db: Session):
+        return db.query(Word.id, Word.difficulty, Word.times_shown, Word.times_correct).all()
+
+    def _load_counters(self, rows, source: array) -> None:
+        self._counters = {
+            word_id: [times_shown or 0, times_correct or 0]
+            for word_id, _, times_shown, times_correct in rows
+        }
+        self._difficulty = {word_id: difficulty for word_id, difficulty, _, _ in rows}
+        self._counters_source = source
+
+    def _build(self, ids: array) -> _Table:
+        counters = self._counters
+        weights = [word_weight(*counters.get(word_id, (0, 0))) for word_id in ids]
+        return _Table(ids, AliasTable(ids, weights))
+
+    def _install(self, difficulty: Optional[str], table: _Table) -> None:
+        self._tables[difficulty] = table
+        self._changes[difficulty] = 0
+        self._rebuilds += 1
+        logger.debug(
+            f"Таблица весов слов перестроена: {difficulty or 'все'}, {len(table.alias)} слов"
+        )
+
+    def _get_table(self, db: Session, difficulty: Optional[str]) -> AliasTable:
+        ids = word_pool.ids(db, difficulty)
+        table = self._tables.get(difficulty)
+        if table is not None:
+            if (
+                table.source_ids is not ids
+                or self._changes.get(difficulty, 0) > self.rebuild_drift * len(ids)
+            ):
+                # Пул обновлен или веса заметно изменились: таблица перестраивается
+                # в фоне, а выбор пока идет по прежней
+                self._schedule_rebuild()
+            return table.alias
+
+        # Первая таблица сложности строится сразу. Счетчики читаются до блокировки:
+        # под ней нельзя обращаться к БД, иначе запрос, приостановленный в run_sync,
+        # держит блокировку в потоке цикла событий
+        source = word_pool.ids(db)
+        rows = self._read_counters(db) if self._counters_source is None else None
+        with self._lock:
+            if rows is not None and self._counters_source is None:
+                self._load_counters(rows, source)
+            table = self._tables.get(difficulty)
+            if table is None:
+                table = self._build(ids)
+                self._install(difficulty, table)
+            stale = self._counters_source is not source
+        if stale:
+            # Счетчики прочитаны по прежнему пулу - новые слова учтутся после перестроения
+            self._schedule_rebuild()
+        return table.alias
+
+    def _schedule_rebuild(self) -> None:
+        """Запускает перестроение таблиц в фоновом потоке, если оно еще не идет."""
+        if not self._rebuilding.acquire(blocking=False):
+            return
+        try:
+            threading.Thread(
+                target=self._rebuild, name="word-weights-rebuild", daemon=True
+            ).start()
+        except Exception:
+            self._rebuilding.release()
+            raise
+
+    def _rebuild(self) -> None:
+        """
+        Перестраивает построенные таблицы по текущему пулу слов.
+
+        Если пул обновлен, счетчики перечитываются из БД: так становятся видны
+        ответы, записанные другими процессами. Новые таблицы подменяют прежние
+        по одной, выбор слов перестроение не ждет.
+        """
+        from app.database import SessionLocal
+
+        db = SessionLocal()
+        try:
+            source = word_pool.ids(db)
+            if self._counters_source is not source:
+                rows = self._read_counters(db)
+                with self._lock:
+                    self._load_counters(rows, source)
+            for difficulty in list(self._tables):
+                table = self._build(word_pool.ids(db, difficulty))
+                with self._lock:
+                    self._install(difficulty, table)
+        except Exception as e:
+            logger.error(f"Ошибка перестроения таблиц весов слов: {e}")
+        finally:
+            db.close()
+            self._rebuilding.release()
+
+    @staticmethod
+    def _user_factors(db: Session, user_id: int, word_ids: List[int]) -> Dict[int, float]:
+        """Множители весов по точности пользователя (для слов без ответов - 1)."""
+        rows = db.query(UserWordStats.word_id, UserWordStats.seen, UserWordStats.correct).filter(
+            UserWordStats.user_id == user_id, UserWordStats.word_id.in_(word_ids)
+        )
+        factors = {}
+        for word_id, seen, correct in rows:
+            mastery = (correct or 0) / ((seen or 0) + 1)
+            factors[word_id] = 1.0 - (1.0 - USER_MASTERED_FACTOR) * mastery
+        return factors
+
+    def sample(
+        self,
+        db: Session,
+        user_id: int,
+        count: int,
+        difficulty: Optional[str] = None,
+        excluded_ids: Optional[Collection[int]] = None,
+    ) -> List[WordRecord]:
+        """
+        Выбирает до count слов без повторов с учетом весов.
+
+        Кандидаты выбираются из таблицы псевдонимов, затем из них берутся count
+        слов с учетом точности пользователя (user_word_stats). Если кандидатов не хватает
+        (почти все слова исключены), оставшиеся слова выбираются равномерно.
+        """
+        table = self._get_table(db, difficulty)
+        if not len(table) or count <= 0:
+            return []
+
+        excluded: Collection[int] = excluded_ids or ()
+        wanted = count * CANDIDATE_FACTOR
+        candidates: List[int] = []
+        seen = set()
+        attempts = 0
+        max_attempts = wanted * 4 + 32
+        while len(candidates) < wanted and attempts < max_attempts:
+            word_id = table.draw()
+            attempts += 1
+            if word_id not in seen and word_id not in excluded:
+                seen.add(word_id)
+                candidates.append(word_id)
+
+        chosen: List[int] = []
+        if candidates:
+            factors = self._user_factors(db, user_id, candidates)
+            # Взвешенный выбор без возвращения: ключ u^(1/w), берем наибольшие
+            chosen = sorted(
+                candidates,
+                key=lambda word_id: random.random() ** (1.0 / factors.get(word_id, 1.0)),
+                reverse=True,
+            )[:count]
+
+        if len(chosen) < count:
+            taken = set(chosen)
+            fill = word_pool.sample(db, count - len(chosen), difficulty, taken | set(excluded))
+            for record in fill:
+                if record.id not in taken:
+                    taken.add(record.id)
+                    chosen.append(record.id)
+
+        records = (word_pool.get(db, word_id) for word_id in chosen)
+        return [record for record in records if record is not None]
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "tables": len(self._tables),
+                "rebuilds_total": self._rebuilds,
+                "words": len(self._counters),
+            }
+
+
+# Взвешенный выбор слов процесса (включается настройкой weighted_selection_<тип игры>)
+word_sampler = WordWeightSampler(rebuild_drift=settings.WORD_WEIGHTS_REBUILD_DRIFT)
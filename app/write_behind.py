@@ -0,0 +1,316 @@
+"""
+Отложенная (write-behind) запись ответов и счетчиков слов.
+
+Проверка ответа только добавляет событие в очередь в памяти, а фоновый поток
+записывает накопленные события пачками: по достижении размера пачки или по
+таймеру. При остановке приложения очередь сбрасывается целиком (lifespan).
+Ответы, принятые, но еще не записанные, теряются только при аварийном
+завершении процесса. Ответ, который отвергает БД (например, слово удалено),
+отбрасывается один, не затрагивая остальную пачку.
+"""
+
+import logging
+import threading
+import time
+from collections import Counter, deque
+from datetime import datetime
+from typing import Any, Deque, Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+from sqlalchemy.exc import IntegrityError
+from starlette.concurrency import run_in_threadpool
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class AnswerEvent(NamedTuple):
+    """Ответ пользователя на слово, ожидающий записи в user_word_history."""
+
+    user_id: int
+    word_id: int
+    game_type: str
+    correct: bool
+    used_at: datetime
+
+
+class AnswerQueueFull(Exception):
+    """Очередь записи ответов заполнена - запрос нужно отклонить (503)."""
+
+
+class AnswerWriteBuffer:
+    """
+    Буфер ответов и приращений счетчиков слов (times_shown / times_correct).
+
+    Если фоновый поток не запущен (CLI, скрипты), записи выполняются сразу.
+    Если запись не успевает за ответами и очередь заполнена, новый ответ
+    отклоняется AnswerQueueFull, а не записывается в потоке запроса.
+    """
+
+    def __init__(
+        self,
+        batch_size: int = 500,
+        flush_interval: float = 1.0,
+        max_queue: int = 50000,
+        max_attempts: int = 3,
+    ):
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_queue = max_queue
+        self.max_attempts = max_attempts
+
+        self._answers: Deque[Tuple[AnswerEvent, int]] = deque()
+        self._shown: Counter = Counter()
+        self._last_used: Dict[int, datetime] = {}
+
+        self._cond = threading.Condition()
+        self._flush_lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self._stopping = False
+
+        # Метрики
+        self._enqueued = 0
+        self._written = 0
+        self._dropped = 0
+        self._rejected = 0
+        self._overloaded = 0
+        self._batches = 0
+        self._failed_batches = 0
+        self._max_depth = 0
+        self._last_flush_seconds = 0.0
+        self._last_flush_size = 0
+        self._last_flush_at: Optional[float] = None
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self) -> None:
+        """Запускает фоновый поток записи."""
+        if self.running:
+            return
+        self._stopping = False
+        self._thread = threading.Thread(target=self._run, name="answer-write-behind", daemon=True)
+        self._thread.start()
+        logger.info("Фоновая запись ответов запущена")
+
+    def stop(self, timeout: float = 10.0) -> None:
+        """Останавливает фоновый поток и записывает все, что осталось в очереди."""
+        with self._cond:
+            self._stopping = True
+            self._cond.notify_all()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+        self.flush()
+        logger.info("Фоновая запись ответов остановлена, очередь сброшена")
+
+    def _enqueue(self, event: AnswerEvent) -> None:
+        with self._cond:
+            depth = len(self._answers)
+            if depth >= self.max_queue and self.running:
+                self._overloaded += 1
+                raise AnswerQueueFull(f"Очередь записи ответов заполнена ({depth})")
+            self._answers.append((event, 0))
+            self._enqueued += 1
+            self._max_depth = max(self._max_depth, depth + 1)
+            if depth + 1 >= self.batch_size:
+                self._cond.notify()
+
+    def add_answer(self, event: AnswerEvent) -> None:
+        """Добавляет ответ в очередь записи."""
+        self._enqueue(event)
+        if not self.running:
+            self.flush()
+
+    async def add_answer_async(self, event: AnswerEvent) -> None:
+        """
+        Добавляет ответ из асинхронного маршрута.
+
+        Без фонового потока запись выполняется в пуле потоков, а не в цикле событий.
+        """
+        self._enqueue(event)
+        if not self.running:
+            await run_in_threadpool(self.flush)
+
+    def add_shown(self, word_ids: Iterable[int], used_at: datetime) -> None:
+        """Учитывает показ слов (times_shown, last_used_at)."""
+        with self._cond:
+            for word_id in word_ids:
+                self._shown[word_id] += 1
+                self._last_used[word_id] = used_at
+
+        if not self.running:
+            self.flush()
+
+    def _run(self) -> None:
+        while True:
+            with self._cond:
+                self._cond.wait_for(
+                    lambda: self._stopping or len(self._answers) >= self.batch_size,
+                    timeout=self.flush_interval,
+                )
+                if self._stopping:
+                    return
+            try:
+                self.flush()
+            except Exception as e:  # Поток записи не должен завершаться из-за ошибки
+                logger.error(f"Ошибка фоновой записи ответов: {e}")
+
+    def _take_batch(
+        self,
+    ) -> Tuple[List[Tuple[AnswerEvent, int]], Dict[int, int], Dict[int, datetime]]:
+        with self._cond:
+            count = min(len(self._answers), self.batch_size)
+            answers = [self._answers.popleft() for _ in range(count)]
+            shown, last_used = dict(self._shown), self._last_used
+            self._shown = Counter()
+            self._last_used = {}
+        return answers, shown, last_used
+
+    def _requeue(
+        self,
+        answers: List[Tuple[AnswerEvent, int]],
+        shown: Dict[int, int],
+        last_used: Dict[int, datetime],
+    ) -> None:
+        """Возвращает неудачную пачку в начало очереди (с ограничением попыток)."""
+        retry = [
+            (event, attempts + 1)
+            for event, attempts in answers
+            if attempts + 1 < self.max_attempts
+        ]
+        dropped = len(answers) - len(retry)
+        with self._cond:
+            self._answers.extendleft(reversed(retry))
+            self._shown.update(shown)
+            for word_id, used_at in last_used.items():
+                self._last_used.setdefault(word_id, used_at)
+            self._dropped += dropped
+        if dropped:
+            logger.error(
+                f"Отброшено ответов после {self.max_attempts} неудачных попыток: {dropped}"
+            )
+
+    @staticmethod
+    def _apply(
+        answers: List[Tuple[AnswerEvent, int]],
+        shown: Dict[int, int],
+        last_used: Dict[int, datetime],
+    ) -> None:
+        from app.database import SessionLocal, apply_answer_batch
+
+        db = SessionLocal()
+        try:
+            apply_answer_batch(db, [event for event, _ in answers], shown, last_used)
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+
+    def _write(
+        self,
+        answers: List[Tuple[AnswerEvent, int]],
+        shown: Dict[int, int],
+        last_used: Dict[int, datetime],
+    ) -> int:
+        """
+        Записывает пачку, отбрасывая только ответы, которые отвергает БД.
+
+        Если пачка нарушает ограничения (слово или пользователь удалены, ответ
+        повторяется), она делится пополам, пока нарушающие ответы не останутся
+        по одному; они логируются и отбрасываются, остальные записываются.
+        При прочих ошибках (БД недоступна) незаписанная часть возвращается
+        в очередь, а исключение пробрасывается.
+
+        Returns:
+            int: Количество записанных ответов
+        """
+        written = 0
+        parts = [(answers, shown, last_used)]
+        while parts:
+            part, part_shown, part_last_used = parts.pop()
+            try:
+                self._apply(part, part_shown, part_last_used)
+            except IntegrityError as e:
+                if len(part) > 1:
+                    middle = len(part) // 2
+                    # Приращения показов ограничений не нарушают - идут с первой половиной
+                    parts.append((part[middle:], {}, {}))
+                    parts.append((part[:middle], part_shown, part_last_used))
+                elif part:
+                    event = part[0][0]
+                    self._rejected += 1
+                    logger.error(f"Ответ отброшен, запись отвергнута БД: {event}: {e.orig}")
+                    if part_shown:
+                        parts.append(([], part_shown, part_last_used))
+                else:
+                    logger.error(f"Приращения показов слов отброшены: {e.orig}")
+                continue
+            except Exception:
+                for rest in [(part, part_shown, part_last_used)] + parts:
+                    self._requeue(*rest)
+                raise
+            written += len(part)
+        return written
+
+    def flush(self) -> int:
+        """
+        Записывает все накопленные события пачками по batch_size.
+
+        Returns:
+            int: Количество записанных ответов
+        """
+        written = 0
+        with self._flush_lock:
+            while True:
+                answers, shown, last_used = self._take_batch()
+                if not answers and not shown:
+                    break
+
+                started = time.perf_counter()
+                try:
+                    batch_written = self._write(answers, shown, last_used)
+                except Exception as e:
+                    self._failed_batches += 1
+                    logger.error(f"Ошибка записи пачки ответов ({len(answers)}): {e}")
+                    break
+
+                written += batch_written
+                self._written += batch_written
+                self._batches += 1
+                self._last_flush_seconds = time.perf_counter() - started
+                self._last_flush_size = len(answers)
+                self._last_flush_at = time.time()
+        return written
+
+    def stats(self) -> Dict[str, Any]:
+        """Метрики очереди для мониторинга."""
+        with self._cond:
+            depth = len(self._answers)
+            pending_words = len(self._shown)
+        return {
+            "running": self.running,
+            "queue_depth": depth,
+            "max_queue_depth": self._max_depth,
+            "pending_shown_words": pending_words,
+            "enqueued_total": self._enqueued,
+            "written_total": self._written,
+            "dropped_total": self._dropped,
+            "rejected_total": self._rejected,
+            "overloaded_total": self._overloaded,
+            "batches_total": self._batches,
+            "failed_batches_total": self._failed_batches,
+            "last_flush_seconds": self._last_flush_seconds,
+            "last_flush_size": self._last_flush_size,
+            "last_flush_at": self._last_flush_at,
+        }
+
+
+# Буфер записи ответов процесса (запускается в lifespan приложения)
+answer_buffer = AnswerWriteBuffer(
+    batch_size=settings.WRITE_BUFFER_BATCH_SIZE,
+    flush_interval=settings.WRITE_BUFFER_FLUSH_SECONDS,
+    max_queue=settings.WRITE_BUFFER_MAX_QUEUE,
+)
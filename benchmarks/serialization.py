@@ -0,0 +1,104 @@
+"""
+Сравнение стоимости сериализации ответов игрового API.
+
+Было: словари -> jsonable_encoder -> JSONResponse (stdlib json).
+Стало: словари -> модель ответа (pydantic) -> ORJSONResponse.
+
+Запуск (переменные окружения не нужны):
+    python benchmarks/serialization.py [--rounds N]
+"""
+
+import argparse
+import random
+import string
+import sys
+import timeit
+from pathlib import Path
+from typing import Any, Callable, Dict, List
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse, ORJSONResponse
+from pydantic import TypeAdapter
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from app.schemas import GameWordOut, MatchingCheckResponse  # noqa: E402
+
+DESCRIPTION_WORDS = "слово которое обозначает предмет действие или признак в языке".split()
+
+
+def make_round(size: int) -> List[Dict[str, Any]]:
+    """Раунд "Сопоставления" с реалистичными полями."""
+    words = []
+    for word_id in range(1, size + 1):
+        text = "".join(random.choices(string.ascii_lowercase, k=random.randint(3, 12)))
+        words.append(
+            {
+                "id": word_id,
+                "difficulty": random.choice(["easy", "medium", "hard"]),
+                "text": text,
+                "description": " ".join(random.choices(DESCRIPTION_WORDS, k=8)).capitalize(),
+                "translation": " ".join(random.choices(DESCRIPTION_WORDS, k=2)),
+            }
+        )
+    return words
+
+
+def make_matching_result(size: int) -> Dict[str, Any]:
+    results = [{"word_id": word_id, "correct": random.random() < 0.7} for word_id in range(size)]
+    return {"all_correct": all(r["correct"] for r in results), "results": results}
+
+
+def old_path(payload: Any) -> bytes:
+    """Ответ без модели: jsonable_encoder + stdlib json."""
+    return JSONResponse(content=jsonable_encoder(payload)).body
+
+
+def new_path(adapter: TypeAdapter) -> Callable[[Any], bytes]:
+    """Ответ с моделью: проверка pydantic + сериализация в JSON-типы + orjson."""
+
+    def serialize(payload: Any) -> bytes:
+        content = adapter.dump_python(
+            adapter.validate_python(payload), mode="json", exclude_unset=True
+        )
+        return ORJSONResponse(content=content).body
+
+    return serialize
+
+
+def measure(name: str, func: Callable[[Any], bytes], payload: Any, rounds: int) -> float:
+    seconds = min(timeit.repeat(lambda: func(payload), number=rounds, repeat=5))
+    per_call_us = seconds / rounds * 1_000_000
+    print(f"  {name:<32} {per_call_us:8.1f} мкс/ответ")
+    return per_call_us
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rounds", type=int, default=2000, help="Повторов на замер")
+    args = parser.parse_args()
+
+    random.seed(42)
+    cases = [
+        ("/api/words/matching, 5 слов", make_round(5), TypeAdapter(List[GameWordOut])),
+        ("/api/words/matching, 20 слов", make_round(20), TypeAdapter(List[GameWordOut])),
+        (
+            "/api/matching/check, 20 ответов",
+            make_matching_result(20),
+            TypeAdapter(MatchingCheckResponse),
+        ),
+    ]
+
+    for title, payload, adapter in cases:
+        # Оба пути должны давать одинаковый JSON
+        assert jsonable_encoder(payload) == adapter.dump_python(
+            adapter.validate_python(payload), mode="json", exclude_unset=True
+        )
+        print(title)
+        old = measure("jsonable_encoder + json", old_path, payload, args.rounds)
+        new = measure("модель ответа + orjson", new_path(adapter), payload, args.rounds)
+        print(f"  ускорение: x{old / new:.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,12 @@
+"""
+Общие настройки тестов.
+
+Приложение читает настройки при импорте, поэтому переменные окружения
+задаются до импорта модулей app (в CI они приходят из workflow).
+"""
+
+import os
+
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+os.environ.setdefault("SECRET_KEY", "tests")
+os.environ.setdefault("INIT_DB", "false")
@@ -0,0 +1,91 @@
+"""
+Очередь повторения не повторяет слова, ответы на которые еще не записаны.
+
+Ответ попадает в кэш недавних слов сразу, а расписание (word_reviews)
+пересчитывается только при записи пачки ответов. Следующий раунд не должен
+снова выдавать те же слова как подлежащие повторению.
+"""
+
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session
+from sqlalchemy.pool import StaticPool
+
+from app.database import apply_answer_batch, get_due_words
+from app.models import Base, User, Word, WordReview
+from app.recent_words import recent_words
+from app.word_pool import word_pool
+from app.write_behind import AnswerEvent
+
+USER_ID = 1
+DUE_WORDS = 6
+ROUND_SIZE = 3
+
+
+@pytest.fixture
+def db():
+    engine = create_engine(
+        "sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool
+    )
+    Base.metadata.create_all(engine)
+    session = Session(bind=engine)
+    session.add(User(id=USER_ID, name="test", email="test@example.com", password_hash="x"))
+    session.add_all(
+        Word(
+            id=word_id,
+            text=f"word{word_id}",
+            translation=f"слово{word_id}",
+            description="описание",
+        )
+        for word_id in range(1, DUE_WORDS + 1)
+    )
+    now = datetime.now(timezone.utc)
+    session.add_all(
+        WordReview(
+            user_id=USER_ID,
+            word_id=word_id,
+            due_at=now - timedelta(hours=word_id),
+            last_reviewed_at=now - timedelta(days=2),
+        )
+        for word_id in range(1, DUE_WORDS + 1)
+    )
+    session.commit()
+    # Процессные кэши могли остаться от других тестов
+    word_pool.invalidate()
+    recent_words.forget(USER_ID)
+    yield session
+    recent_words.forget(USER_ID)
+    session.close()
+    engine.dispose()
+
+
+def answer_round(words, correct: bool, used_at: datetime):
+    """Ответы раунда: в кэше недавних слов сразу, как в проверке ответа."""
+    events = []
+    for word in words:
+        recent_words.record(USER_ID, word.id, used_at)
+        events.append(AnswerEvent(USER_ID, word.id, "typing", correct, used_at))
+    return events
+
+
+def test_consecutive_rounds_do_not_repeat_due_words(db):
+    first = get_due_words(db, USER_ID, ROUND_SIZE)
+    assert len(first) == ROUND_SIZE
+    # Ответы еще в очереди отложенной записи: due_at в БД не изменился
+    answer_round(first, True, datetime.now(timezone.utc))
+
+    second = get_due_words(db, USER_ID, ROUND_SIZE)
+    assert len(second) == ROUND_SIZE
+    assert not {word.id for word in first} & {word.id for word in second}
+
+
+def test_written_wrong_answer_returns_after_relearn_interval(db):
+    words = get_due_words(db, USER_ID, ROUND_SIZE)
+    # Ошибка записана давно: слово снова подлежит повторению
+    answered_at = datetime.now(timezone.utc) - timedelta(hours=1)
+    apply_answer_batch(db, answer_round(words, False, answered_at), {}, {})
+
+    again = get_due_words(db, USER_ID, DUE_WORDS)
+    assert {word.id for word in words} <= {word.id for word in again}
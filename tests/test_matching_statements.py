@@ -0,0 +1,83 @@
+"""
+Бюджет запросов проверки "Сопоставления".
+
+Проверка раунда должна выполнять постоянное число SQL-инструкций и один коммит
+независимо от количества пар.
+"""
+
+from typing import List, Tuple
+
+import pytest
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import Session
+from sqlalchemy.pool import StaticPool
+
+from app.models import Base, User, Word
+from app.routes.game import _check_matching_answers
+
+# SELECT слов, SELECT истории за день (счетчик users), upsert дневного агрегата,
+# upsert итогов пользователя по словам, SELECT и upsert расписания повторения,
+# вставка истории, UPDATE счетчиков слов
+MATCHING_STATEMENT_BUDGET = 8
+MAX_PAIRS = 20
+
+
+@pytest.fixture
+def db():
+    engine = create_engine(
+        "sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool
+    )
+    Base.metadata.create_all(engine)
+    session = Session(bind=engine)
+    session.add(User(id=1, name="test", email="test@example.com", password_hash="x"))
+    session.add_all(
+        Word(
+            id=word_id,
+            text=f"word{word_id}",
+            translation=f"слово{word_id}",
+            description="описание",
+        )
+        for word_id in range(1, MAX_PAIRS + 1)
+    )
+    session.commit()
+    yield session
+    session.close()
+    engine.dispose()
+
+
+def run_round(db: Session, pairs: int) -> Tuple[int, int]:
+    """Возвращает (число инструкций, число коммитов) для раунда из pairs пар."""
+    statements: List[str] = []
+    commits: List[int] = []
+
+    def count_statement(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    engine = db.get_bind()
+    event.listen(engine, "before_cursor_execute", count_statement)
+    event.listen(db, "after_commit", lambda session: commits.append(1))
+    try:
+        answers = [
+            # Каждый второй ответ неверный
+            {"wordId": word_id, "answer": f"слово{word_id}" if word_id % 2 else "нет"}
+            for word_id in range(1, pairs + 1)
+        ]
+        _, results = _check_matching_answers(db, 1, answers)
+        assert len(results) == pairs
+    finally:
+        event.remove(engine, "before_cursor_execute", count_statement)
+    return len(statements), len(commits)
+
+
+@pytest.mark.parametrize("pairs", [3, 10, MAX_PAIRS])
+def test_matching_check_statement_budget(db, pairs):
+    statements, commits = run_round(db, pairs)
+    assert statements <= MATCHING_STATEMENT_BUDGET
+    assert commits == 1
+
+
+def test_repeated_word_is_recorded_once_per_answer(db):
+    answers = [{"wordId": 1, "answer": "нет"}, {"wordId": 1, "answer": "слово1"}]
+    all_correct, results = _check_matching_answers(db, 1, answers)
+    assert not all_correct
+    assert [result["correct"] for result in results] == [False, True]
@@ -0,0 +1,113 @@
+"""
+Параллельное начисление опыта одному пользователю.
+
+Много потоков одновременно вызывают add_user_experience; после прогона
+проверяются инварианты: ни одно начисление не потеряно, дневной лимит не
+превышен, уровень и остаток опыта соответствуют сумме начисленного.
+
+По умолчанию используется временная SQLite в файле. Для PostgreSQL задайте
+XP_TEST_DATABASE_URL с пустой тестовой БД: таблицы создаются и удаляются тестом.
+"""
+
+import os
+import threading
+from typing import List, Tuple
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session
+
+from app.database import add_user_experience
+from app.models import Base, GameSetting, User
+from app.settings_cache import game_settings_cache
+
+THREADS = 8
+AWARDS_PER_THREAD = 20
+# Шаг уровня не кратен начислению, чтобы проверить перенос остатка
+AWARD = 7
+LEVEL_STEP = 50
+
+
+@pytest.fixture(params=["sqlite", "postgresql"])
+def engine(request, tmp_path):
+    if request.param == "sqlite":
+        engine = create_engine(
+            f"sqlite:///{tmp_path / 'xp.db'}",
+            connect_args={"check_same_thread": False, "timeout": 30},
+        )
+    else:
+        url = os.environ.get("XP_TEST_DATABASE_URL")
+        if not url:
+            pytest.skip("XP_TEST_DATABASE_URL не задан")
+        engine = create_engine(url, pool_size=THREADS, max_overflow=0)
+    Base.metadata.drop_all(engine)
+    Base.metadata.create_all(engine)
+    yield engine
+    Base.metadata.drop_all(engine)
+    engine.dispose()
+    game_settings_cache.invalidate()
+
+
+def prepare_user(engine, daily_limit: int) -> int:
+    with Session(engine) as db:
+        user = User(name="xp", email="xp@example.com", password_hash="x")
+        db.add(user)
+        db.add_all(
+            [
+                GameSetting(key="daily_experience_limit", value=str(daily_limit)),
+                GameSetting(key="points_for_level_up", value=str(LEVEL_STEP)),
+            ]
+        )
+        db.commit()
+        game_settings_cache.invalidate()
+        return user.id
+
+
+def award_concurrently(engine, user_id: int) -> List[Tuple[int, bool, bool]]:
+    """Результаты всех начислений: (начислено, повышение уровня, лимит достигнут)."""
+    results: List[Tuple[int, bool, bool]] = []
+    errors: List[BaseException] = []
+    results_lock = threading.Lock()
+    start = threading.Barrier(THREADS)
+
+    def worker() -> None:
+        start.wait()
+        try:
+            with Session(engine) as db:
+                for _ in range(AWARDS_PER_THREAD):
+                    award, level_up, limit_reached = add_user_experience(db, user_id, AWARD)
+                    with results_lock:
+                        results.append((award.gained, level_up, limit_reached))
+        except BaseException as e:
+            errors.append(e)
+
+    workers = [threading.Thread(target=worker) for _ in range(THREADS)]
+    for thread in workers:
+        thread.start()
+    for thread in workers:
+        thread.join()
+    if errors:
+        raise errors[0]
+    return results
+
+
+# Лимит исчерпывается посередине прогона; 0 - без лимита
+@pytest.mark.parametrize("daily_limit", [THREADS * AWARDS_PER_THREAD * AWARD // 2, 0])
+def test_concurrent_awards_keep_invariants(engine, daily_limit):
+    user_id = prepare_user(engine, daily_limit)
+    results = award_concurrently(engine, user_id)
+    with Session(engine) as db:
+        user = db.get(User, user_id)
+
+    requested = AWARD * len(results)
+    gained = sum(amount for amount, _, _ in results)
+    assert len(results) == THREADS * AWARDS_PER_THREAD
+    assert gained == (min(requested, daily_limit) if daily_limit else requested)
+    assert user.total_points == gained
+    if daily_limit:
+        assert user.daily_experience == gained
+    assert (user.level - 1) * LEVEL_STEP + user.experience == user.total_points
+    assert 0 <= user.experience < LEVEL_STEP
+    assert sum(1 for _, level_up, _ in results if level_up) <= user.level - 1
+    # После исчерпания лимита опыт не начисляется
+    assert not any(limit_reached and amount for amount, _, limit_reached in results)